@@ -0,0 +1,320 @@
+import os, json, sqlite3, threading, hashlib, time, shutil
+
+from paths import get_cache_dir, get_cache_db_path
+from settings import get_setting
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT NOT NULL,
+    name TEXT NOT NULL,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    accessed_at REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (key, name)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS favicon_origins (
+    origin TEXT PRIMARY KEY,
+    hash TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Names of the files the per-URL cache folders used to hold, and their entry names
+LEGACY_LINK_FILES = {
+    "preview.txt": "preview",
+    "failure.txt": "failure",
+    "thumb_160x100.png": "thumb@1",
+    "thumb_160x100@2x.png": "thumb@2",
+    "thumbnail.png": "thumbnail-source",
+    "favicon.png": "favicon-source",
+}
+
+def url_key(url):
+    # Same hash the per-URL cache folders were named with
+    return hashlib.md5(url.encode()).hexdigest()
+
+def favicon_key(content_hash):
+    return f"favicon/{content_hash}"
+
+class CacheStore:
+    """Single-file cache: previews, failure records and image derivatives as blobs.
+
+    Replaces the cache/<md5>/ folder per URL. Each worker thread gets its own
+    connection (WAL lets them read concurrently); a lookup is one indexed
+    query against the open pack file.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or get_cache_db_path()
+        self.local = threading.local()
+        self.write_lock = threading.Lock()
+        self.touched = {}  # key -> last access; flushed to accessed_at in batches
+        self.touched_lock = threading.Lock()
+        conn = self.connection()
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")  # only applies to a new file
+        conn.executescript(SCHEMA)
+        self.add_access_column(conn)
+        self.migrate_from_folders()
+
+    def add_access_column(self, conn):
+        # Packs created before LRU tracking have no accessed_at column
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(entries)")]
+        if "accessed_at" not in columns:
+            with self.write_lock, conn:
+                conn.execute("ALTER TABLE entries ADD COLUMN accessed_at REAL NOT NULL DEFAULT 0")
+                conn.execute("UPDATE entries SET accessed_at = updated_at")
+
+    def connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self.local.conn = conn
+        return conn
+
+    # === Blobs ===
+
+    def get(self, key, name):
+        row = self.connection().execute(
+            "SELECT data FROM entries WHERE key = ? AND name = ?", (key, name)
+        ).fetchone()
+        if row is None:
+            return None
+        # Reads stay read-only; access times are written later in one batch
+        with self.touched_lock:
+            self.touched[key] = time.time()
+        return bytes(row[0])
+
+    def put(self, key, name, data):
+        conn = self.connection()
+        now = time.time()
+        with self.write_lock, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, name, data, size, updated_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, name, sqlite3.Binary(data), len(data), now, now)
+            )
+
+    def has(self, key, name):
+        """Existence check that neither reads the blob nor counts as an access."""
+        return self.connection().execute(
+            "SELECT 1 FROM entries WHERE key = ? AND name = ?", (key, name)
+        ).fetchone() is not None
+
+    def delete(self, key, *names):
+        """Deletes the named entries of key, or every entry of key when no names are given."""
+        conn = self.connection()
+        with self.write_lock, conn:
+            if names:
+                conn.executemany("DELETE FROM entries WHERE key = ? AND name = ?", [(key, name) for name in names])
+            else:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def get_json(self, key, name):
+        data = self.get(key, name)
+        if data is None:
+            return None
+        try:
+            return json.loads(data.decode("utf-8"))
+        except Exception as e:
+            print(f"Failed to decode cached {name}:", e)
+            return None
+
+    def put_json(self, key, name, value):
+        self.put(key, name, json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+    # === Size budget and garbage collection ===
+
+    def flush_access_times(self):
+        with self.touched_lock:
+            touched, self.touched = self.touched, {}
+        if not touched:
+            return
+        conn = self.connection()
+        with self.write_lock, conn:
+            conn.executemany(
+                "UPDATE entries SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in touched.items()]
+            )
+
+    def total_size(self):
+        return self.connection().execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def stats(self):
+        conn = self.connection()
+        entries, keys, size = conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT key), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        origins = conn.execute("SELECT COUNT(*) FROM favicon_origins").fetchone()[0]
+        failures = conn.execute("SELECT COUNT(*) FROM entries WHERE name = 'failure'").fetchone()[0]
+        return {"entries": entries, "keys": keys, "bytes": size, "favicon_origins": origins, "failures": failures}
+
+    def enforce_budget(self, max_bytes=None):
+        """Evicts least recently used keys (all their entries at once) until under budget."""
+        max_bytes = max_bytes or get_setting("cache_max_bytes")
+        self.flush_access_times()
+        total = self.total_size()
+        if total <= max_bytes:
+            return 0
+
+        # Evict down to 90% so the next few writes do not trigger another pass
+        target = int(max_bytes * 0.9)
+        conn = self.connection()
+        rows = conn.execute(
+            "SELECT key, SUM(size), MAX(accessed_at) AS last_access FROM entries "
+            "GROUP BY key ORDER BY last_access"
+        ).fetchall()
+        evicted = []
+        for key, size, _ in rows:
+            if total <= target:
+                break
+            evicted.append(key)
+            total -= size
+
+        self._delete_keys(evicted)
+        return len(evicted)
+
+    def collect_orphans(self, live_urls):
+        """Deletes entries of URLs no longer stored and favicons no origin points at."""
+        self.flush_access_times()
+        live_keys = {url_key(url) for url in live_urls}
+        conn = self.connection()
+        referenced = {favicon_key(row[0]) for row in conn.execute("SELECT DISTINCT hash FROM favicon_origins")}
+        orphans = [
+            key for (key,) in conn.execute("SELECT DISTINCT key FROM entries")
+            if key not in (referenced if key.startswith("favicon/") else live_keys)
+        ]
+        self._delete_keys(orphans)
+        return len(orphans)
+
+    def _delete_keys(self, keys):
+        if not keys:
+            return
+        conn = self.connection()
+        # Small batches keep the write lock short so the UI's writes never wait long
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            # An evicted favicon must not stay mapped, or its origins would never fetch it again
+            hashes = [(key[len("favicon/"):],) for key in batch if key.startswith("favicon/")]
+            with self.write_lock, conn:
+                conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in batch])
+                conn.executemany("DELETE FROM favicon_origins WHERE hash = ?", hashes)
+        with self.write_lock:
+            conn.execute("PRAGMA incremental_vacuum").fetchall()
+
+    # === Favicon origins ===
+
+    def get_favicon_hash(self, origin):
+        row = self.connection().execute(
+            "SELECT hash FROM favicon_origins WHERE origin = ?", (origin,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_favicon_hash(self, origin, content_hash):
+        conn = self.connection()
+        with self.write_lock, conn:
+            conn.execute("INSERT OR REPLACE INTO favicon_origins (origin, hash) VALUES (?, ?)", (origin, content_hash))
+
+    def forget_favicon_origin(self, origin):
+        conn = self.connection()
+        with self.write_lock, conn:
+            conn.execute("DELETE FROM favicon_origins WHERE origin = ?", (origin,))
+
+    # === Migration ===
+
+    def migrate_from_folders(self):
+        """Imports the old cache/<md5>/ folders and cache/favicons/ once, then removes them."""
+        conn = self.connection()
+        if conn.execute("SELECT value FROM meta WHERE key = 'migrated_folders'").fetchone():
+            return
+
+        cache_dir = get_cache_dir()
+        migrated = []
+        with self.write_lock, conn:
+            for folder in os.listdir(cache_dir):
+                path = os.path.join(cache_dir, folder)
+                if not os.path.isdir(path):
+                    continue
+                if folder == "favicons":
+                    self._import_favicon_folder(conn, path)
+                else:
+                    for filename, name in LEGACY_LINK_FILES.items():
+                        self._import_file(conn, folder, name, os.path.join(path, filename))
+                migrated.append(path)
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_folders', ?)", (str(len(migrated)),))
+
+        for path in migrated:
+            shutil.rmtree(path, ignore_errors=True)
+        if migrated:
+            print(f"Migrated {len(migrated)} cache folders into {self.db_path}")
+
+    def _import_file(self, conn, key, name, path):
+        if not os.path.isfile(path):
+            return
+        with open(path, "rb") as f:
+            data = f.read()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, name, data, size, updated_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, name, sqlite3.Binary(data), len(data), os.path.getmtime(path), os.path.getmtime(path))
+        )
+
+    def _import_favicon_folder(self, conn, path):
+        for filename in os.listdir(path):
+            stem, ext = os.path.splitext(filename)
+            if ext == ".img":
+                self._import_file(conn, favicon_key(stem), "source", os.path.join(path, filename))
+            elif stem.endswith("_24@2x"):
+                self._import_file(conn, favicon_key(stem[:-len("_24@2x")]), "@2", os.path.join(path, filename))
+            elif stem.endswith("_24"):
+                self._import_file(conn, favicon_key(stem[:-len("_24")]), "@1", os.path.join(path, filename))
+
+        index_path = os.path.join(path, "index.json")
+        if os.path.exists(index_path):
+            try:
+                with open(index_path, "r", encoding="utf-8") as f:
+                    index = json.load(f)
+                conn.executemany("INSERT OR REPLACE INTO favicon_origins (origin, hash) VALUES (?, ?)", index.items())
+            except Exception as e:
+                print("Failed to migrate favicon index:", e)
+
+class CacheMaintenance(threading.Thread):
+    """Background pass that drops orphaned entries and enforces the size budget."""
+
+    def __init__(self, cache, live_urls, interval=None):
+        super().__init__(name="stashly-cache-gc", daemon=True)
+        self.cache = cache
+        self.live_urls = live_urls  # callable returning every stored URL
+        self.interval = interval or get_setting("cache_gc_interval_seconds")
+        self.stopped = threading.Event()
+
+    def run(self):
+        # Let startup finish before the first pass
+        if self.stopped.wait(get_setting("cache_gc_initial_delay_seconds")):
+            return
+        while True:
+            try:
+                orphans = self.cache.collect_orphans(self.live_urls())
+                evicted = self.cache.enforce_budget()
+                if orphans or evicted:
+                    print(f"Cache GC: removed {orphans} orphaned and {evicted} least recently used entries")
+            except Exception as e:
+                print("Cache GC failed:", e)
+            if self.stopped.wait(self.interval):
+                return
+
+    def stop(self):
+        self.stopped.set()
+
+_cache_store = None
+_cache_store_lock = threading.Lock()
+
+def get_cache_store():
+    global _cache_store
+    with _cache_store_lock:
+        if _cache_store is None:
+            _cache_store = CacheStore()
+        return _cache_store
@@ -0,0 +1,224 @@
+from PyQt6.QtWidgets import QFrame, QWidget, QLabel, QVBoxLayout, QPushButton
+from PyQt6.QtGui import QCursor, QPainter, QColor, QPen, QPixmap, QFont, QImage, QImageReader
+from PyQt6.QtCore import Qt, pyqtSignal
+import os, hashlib
+
+from paths import load_icon_mapping, get_scaled_icons_dir
+
+CATEGORY_ICON_SIZE = 48
+
+# Scaled category icons by file path, with the mtime they were decoded at
+_category_icons = {}
+
+def category_icon_pixmap(path):
+    """The 48x48 icon for path, decoded and scaled once per version of the file.
+
+    Icons that are not stored at 48px (the fallback icon, icons copied by
+    older versions) get a scaled copy on disk, so later starts never decode
+    the full-size file.
+    """
+    try:
+        mtime = os.path.getmtime(path)
+    except (OSError, TypeError):
+        return None
+    cached = _category_icons.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    pixmap = load_scaled_icon(path, mtime)
+    if pixmap is None:
+        return None
+    _category_icons[path] = (mtime, pixmap)
+    return pixmap
+
+def load_scaled_icon(path, mtime):
+    name = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()
+    scaled_dir = get_scaled_icons_dir()
+    scaled_path = os.path.join(scaled_dir, f"{name}-{int(mtime)}.png")
+    if os.path.exists(scaled_path):
+        pixmap = QPixmap(scaled_path)
+        if not pixmap.isNull():
+            return pixmap
+
+    # Reading the header is enough to tell whether the file is already icon-sized
+    size = QImageReader(path).size()
+    if CATEGORY_ICON_SIZE in (size.width(), size.height()):
+        pixmap = QPixmap(path)
+        return None if pixmap.isNull() else pixmap
+
+    image = QImage(path)
+    if image.isNull():
+        return None
+    image = image.scaled(CATEGORY_ICON_SIZE, CATEGORY_ICON_SIZE, Qt.AspectRatioMode.KeepAspectRatioByExpanding, Qt.TransformationMode.SmoothTransformation)
+    try:
+        # Copies made for older versions of the file are no longer needed
+        for filename in os.listdir(scaled_dir):
+            if filename.startswith(name + "-"):
+                os.remove(os.path.join(scaled_dir, filename))
+        image.save(scaled_path, "PNG")
+    except OSError as e:
+        print("Failed to store scaled icon:", e)
+    return QPixmap.fromImage(image)
+
+def save_scaled_icon(source_path, destination):
+    """Stores the picked icon already scaled, so loading it never decodes the full image."""
+    image = QImage(source_path)
+    if image.isNull():
+        raise ValueError(f"Unsupported image: {source_path}")
+    scaled = image.scaled(CATEGORY_ICON_SIZE, CATEGORY_ICON_SIZE, Qt.AspectRatioMode.KeepAspectRatioByExpanding, Qt.TransformationMode.SmoothTransformation)
+    if not scaled.save(destination, "PNG"):
+        raise OSError(f"Could not write {destination}")
+
+class CategoryCard(QFrame):
+    clicked = pyqtSignal(str)
+    rightclicked = pyqtSignal(str)
+
+    def __init__(self, category_name, icon_path=None, fallback_icon_path="minimize.png", count=None):
+        super().__init__()
+
+        self.category_name = category_name
+        self.icon_path = icon_path
+        self.fallback_icon_path = fallback_icon_path
+        self.setObjectName("CategoryCard")
+        self.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.setStyleSheet("""
+            QFrame#CategoryCard {
+                background-color: rgba(255, 255, 255, 30);
+                border-radius: 12px;
+                border: 1px solid rgba(255, 255, 255, 40);
+            }
+            QFrame#CategoryCard:hover {
+                background-color: rgba(255, 255, 255, 50);
+            }
+            QLabel {
+                background: transparent;
+                color: white;
+                font-size: 14px;
+            }
+        """)
+
+        # Mouse tracking for hover and click
+        self.setMouseTracking(True)
+
+        self.setFixedSize(150, 150)  # Uniform size for all cards
+
+        # Main layout
+        layout = QVBoxLayout()
+        layout.setContentsMargins(10, 10, 10, 10)
+        layout.setSpacing(8)
+        layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
+
+        # Icon container
+        icon_container = QWidget()
+        icon_container_layout = QVBoxLayout(icon_container)
+        icon_container_layout.setContentsMargins(0, 0, 0, 0)
+        icon_container_layout.setSpacing(0)
+        icon_container_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
+
+        self.icon_label = QLabel()
+        self.icon_label.setFixedSize(48, 48)
+        self.icon_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.load_icon()
+        icon_container_layout.addWidget(self.icon_label)
+        icon_container.setLayout(icon_container_layout)
+
+        # Category name
+        name_label = QLabel(category_name)
+        name_label.setFont(QFont("Arial", 11, QFont.Weight.Medium))
+        name_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        name_label.setWordWrap(True)
+        name_label.setStyleSheet("color: white;")
+
+        layout.addWidget(icon_container)
+        layout.addWidget(name_label)
+
+        self.setLayout(layout)
+        # Unified translucent card styling
+        self.setStyleSheet("""
+            QFrame#CategoryCard {
+                background-color: rgba(255, 255, 255, 0.08);
+                border: 1px solid rgba(255, 255, 255, 0.2);
+                border-radius: 12px;
+            }
+            QFrame#CategoryCard:hover {
+                background-color: rgba(0, 122, 204, 0.3);
+                border: 1px solid #007acc;
+            }
+        """)
+        self.set_count(count)
+
+    def set_count(self, count):
+        if count is not None:
+            self.setToolTip(f"{count} link{'' if count == 1 else 's'}")
+
+    def load_icon(self):
+        """(Re)loads the icon, e.g. after the user picked a new one for the category."""
+        mapped_icon_path = load_icon_mapping().get(self.category_name)
+
+        # Check icon_path validity; else fallback
+        pixmap = None
+        for path in (mapped_icon_path, self.icon_path, self.fallback_icon_path):
+            pixmap = category_icon_pixmap(path)
+            if pixmap is not None:
+                break
+        if pixmap is None:
+            # Create a simple colored pixmap fallback (e.g., gray square)
+            pixmap = QPixmap(CATEGORY_ICON_SIZE, CATEGORY_ICON_SIZE)
+            pixmap.fill(QColor(180, 180, 180))
+
+        self.icon_label.setPixmap(pixmap)
+
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            self.clicked.emit(self.category_name)
+        if event.button() == Qt.MouseButton.RightButton:
+            self.rightclicked.emit(self.category_name)
+    
+    def get_pixmap(self, icon_path):
+        """Returns QPixmap from icon_path, or fallback if not found."""
+        fallback_path = "minimize.png"
+        if icon_path and os.path.exists(icon_path):
+            return QPixmap(icon_path)
+        elif os.path.exists(fallback_path):
+            return QPixmap(fallback_path)
+        else:
+            # Final fallback: empty transparent pixmap
+            pixmap = QPixmap(40, 40)
+            pixmap.fill(Qt.GlobalColor.transparent)
+            return pixmap
+
+class PlusButton(QPushButton):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.default_color = "#4682B4"
+        self.hover_color = "#6495ED"
+        self.current_color = self.default_color
+
+        self.setFixedSize(60, 60)
+        self.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
+        self.setStyleSheet("background-color: #4682B4; border-radius: 30px;")
+        self.setToolTip("Add new link")
+
+    def enterEvent(self, event):
+        self.current_color = self.hover_color
+        self.setStyleSheet(f"background-color: {self.current_color}; border-radius: 30px;")
+        super().enterEvent(event)
+
+    def leaveEvent(self, event):
+        self.current_color = self.default_color
+        self.setStyleSheet(f"background-color: {self.current_color}; border-radius: 30px;")
+        super().leaveEvent(event)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        # Draw plus sign in the center
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        pen = QPen(QColor('white'))
+        pen.setWidth(3)
+        painter.setPen(pen)
+        w, h = self.width(), self.height()
+        # Draw vertical line
+        painter.drawLine(w//2, 3*h//10, w//2, 7*h//10)
+        # Draw horizontal line
+        painter.drawLine(3*w//10, h//2, 7*w//10, h//2)
\ No newline at end of file
@@ -0,0 +1,38 @@
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from repository import get_repository
+
+class RepositorySignals(QObject):
+    """Qt signals for the repository's change events.
+
+    Repository listeners run on whichever thread made the change; emitting
+    from there is safe because connected widgets receive the signal as a
+    queued call on the GUI thread.
+    """
+
+    link_added = pyqtSignal(dict)
+    link_updated = pyqtSignal(dict)
+    link_deleted = pyqtSignal(dict)
+    categories_changed = pyqtSignal()
+    reloaded = pyqtSignal()
+
+    EVENTS = {
+        "added": "link_added",
+        "updated": "link_updated",
+        "deleted": "link_deleted",
+        "categories_changed": "categories_changed",
+        "reloaded": "reloaded",
+    }
+
+    def dispatch(self, event, args):
+        getattr(self, self.EVENTS[event]).emit(*args)
+
+_signals = None
+
+def get_repository_signals():
+    """Must first be called on the GUI thread so the signals live there."""
+    global _signals
+    if _signals is None:
+        _signals = RepositorySignals()
+        get_repository().subscribe(_signals.dispatch)
+    return _signals
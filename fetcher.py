@@ -0,0 +1,187 @@
+import threading, time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from settings import get_setting
+
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+class CircuitOpenError(Exception):
+    """Raised without touching the network while a host's circuit is open."""
+
+class CircuitBreaker:
+    """Per-host breaker: opens after repeated failures, lets one probe through after a cooldown."""
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if not self.probing and time.monotonic() - self.opened_at >= self.cooldown:
+                self.probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.probing or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self.probing = False
+
+def classify_fetch_error(error):
+    if isinstance(error, CircuitOpenError):
+        return "circuit_open"
+    if isinstance(error, requests.Timeout):
+        return "timeout"
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return f"http_{error.response.status_code}"
+    if isinstance(error, requests.ConnectionError):
+        return "connection"
+    return type(error).__name__
+
+class FetchEngine:
+    """Shared HTTP client for previews and images.
+
+    One requests.Session keeps a keep-alive connection pool per host, so a
+    card's page, thumbnail and favicon reuse the same TCP+TLS connection.
+    Concurrency is capped globally and per host, and hosts that keep failing
+    are short-circuited so they cannot tie up the worker threads.
+    """
+
+    def __init__(self, max_connections=None, max_per_host=None):
+        self.max_connections = max_connections or get_setting("fetch_max_connections")
+        self.max_per_host = max_per_host or get_setting("fetch_max_per_host")
+
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=64, pool_maxsize=self.max_per_host)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.global_slots = threading.BoundedSemaphore(self.max_connections)
+        self.host_slots = {}
+        self.breakers = {}
+        self.lock = threading.Lock()
+
+    def host_slot(self, url):
+        host = urlparse(url).netloc.lower()
+        with self.lock:
+            if host not in self.host_slots:
+                self.host_slots[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self.host_slots[host]
+
+    def breaker(self, url):
+        host = urlparse(url).netloc.lower()
+        with self.lock:
+            if host not in self.breakers:
+                self.breakers[host] = CircuitBreaker(
+                    get_setting("circuit_failure_threshold"),
+                    get_setting("circuit_cooldown_seconds")
+                )
+            return self.breakers[host]
+
+    def check_circuit(self, url):
+        breaker = self.breaker(url)
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {urlparse(url).netloc}")
+        return breaker
+
+    @contextmanager
+    def slot(self, url):
+        # Per-host first, so a busy host never sits on global slots
+        with self.host_slot(url):
+            with self.global_slots:
+                yield
+
+    def send(self, breaker, url, **kwargs):
+        recorded = False
+        try:
+            try:
+                response = self.session.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                breaker.record_failure()
+                recorded = True
+                raise
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            recorded = True
+            return response
+        finally:
+            # Any other error (TooManyRedirects, InvalidURL, ...) must still end a probe,
+            # or the host would stay blocked until restart
+            if not recorded and breaker.probing:
+                breaker.record_failure()
+
+    @contextmanager
+    def open(self, url, timeout=8, **kwargs):
+        """Streams a response while holding a connection slot; closes it on exit."""
+        breaker = self.check_circuit(url)
+        with self.slot(url):
+            response = self.send(breaker, url, timeout=timeout, stream=True, **kwargs)
+            try:
+                yield response
+            finally:
+                response.close()
+
+    def get(self, url, timeout=8, **kwargs):
+        breaker = self.check_circuit(url)
+        with self.slot(url):
+            return self.send(breaker, url, timeout=timeout, **kwargs)
+
+IMAGE_CONTENT_TYPES = ("image/", "application/octet-stream")
+
+def download_image(url, max_bytes=None, timeout=5):
+    """Streams an image body, giving up on non-image responses or bodies over max_bytes."""
+    max_bytes = max_bytes or get_setting("image_max_bytes")
+    with get_fetch_engine().open(url, timeout=timeout) as response:
+        if response.status_code != 200:
+            return None
+
+        content_type = response.headers.get("Content-Type", "").lower()
+        if content_type and not content_type.startswith(IMAGE_CONTENT_TYPES):
+            print(f"Skipped non-image response ({content_type}): {url}")
+            return None
+
+        declared = response.headers.get("Content-Length")
+        if declared and declared.isdigit() and int(declared) > max_bytes:
+            print(f"Skipped image over {max_bytes} bytes: {url}")
+            return None
+
+        chunks = []
+        received = 0
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            received += len(chunk)
+            if received > max_bytes:
+                print(f"Skipped image over {max_bytes} bytes: {url}")
+                return None
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_fetch_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = FetchEngine()
+        return _engine
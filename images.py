@@ -0,0 +1,119 @@
+import threading
+
+from PyQt6.QtCore import Qt, QSize, QBuffer, QByteArray, QIODevice
+from PyQt6.QtGui import QImage, QImageReader, QPainter, QPainterPath
+
+from settings import get_setting
+
+# Display sizes in logical pixels; derivatives are rendered at each scale
+THUMBNAIL_SIZE = (160, 100)
+THUMBNAIL_RADIUS = 12
+FAVICON_SIZE = 24
+DERIVATIVE_SCALES = (1, 2)
+
+# Decode bookkeeping, so the memory bound can be checked in practice
+image_stats = {"decoded": 0, "downscaled": 0, "rejected": 0, "peak_decoded_bytes": 0, "peak_source_bytes": 0}
+_image_stats_lock = threading.Lock()
+
+def decode_scaled(data, target, mode=Qt.AspectRatioMode.KeepAspectRatioByExpanding):
+    """Decodes image bytes no larger than needed to cover target.
+
+    QImageReader reads the header first, so JPEGs are decoded directly at the
+    reduced size and the full-resolution bitmap is never allocated.
+    """
+    buffer = QBuffer()
+    buffer.setData(QByteArray(data))
+    buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+
+    reader = QImageReader(buffer)
+    reader.setAutoTransform(True)
+    QImageReader.setAllocationLimit(get_setting("image_decode_limit_mb"))
+
+    size = reader.size()
+    downscaled = False
+    if size.isValid() and (size.width() > target.width() or size.height() > target.height()):
+        reader.setScaledSize(size.scaled(target, mode))
+        downscaled = True
+
+    image = reader.read()
+    with _image_stats_lock:
+        if image.isNull():
+            image_stats["rejected"] += 1
+        else:
+            image_stats["decoded"] += 1
+            image_stats["downscaled"] += int(downscaled)
+            image_stats["peak_decoded_bytes"] = max(image_stats["peak_decoded_bytes"], image.sizeInBytes())
+            image_stats["peak_source_bytes"] = max(image_stats["peak_source_bytes"], len(data))
+    if image.isNull():
+        print("Image decode failed:", reader.errorString())
+    return image
+
+def describe_image_stats():
+    with _image_stats_lock:
+        s = dict(image_stats)
+    return (f"images: {s['decoded']} decoded ({s['downscaled']} at reduced size), {s['rejected']} rejected, "
+            f"peak bitmap {s['peak_decoded_bytes'] / 1024:.0f} KB from a {s['peak_source_bytes'] / 1024:.0f} KB source")
+
+def decode_thumbnail_source(data):
+    largest = max(DERIVATIVE_SCALES)
+    return decode_scaled(data, QSize(THUMBNAIL_SIZE[0] * largest, THUMBNAIL_SIZE[1] * largest))
+
+def decode_favicon_source(data):
+    size = FAVICON_SIZE * max(DERIVATIVE_SCALES)
+    return decode_scaled(data, QSize(size, size), Qt.AspectRatioMode.KeepAspectRatio)
+
+def derivative_scale(device_pixel_ratio):
+    return 2 if device_pixel_ratio > 1 else 1
+
+def make_thumbnail(image, scale=1):
+    """Center-cropped, rounded thumbnail ready to draw at THUMBNAIL_SIZE."""
+    width, height = THUMBNAIL_SIZE[0] * scale, THUMBNAIL_SIZE[1] * scale
+    scaled = image.scaled(width, height, Qt.AspectRatioMode.KeepAspectRatioByExpanding,
+                          Qt.TransformationMode.SmoothTransformation)
+    scaled = scaled.copy((scaled.width() - width) // 2, (scaled.height() - height) // 2, width, height)
+
+    rounded = QImage(width, height, QImage.Format.Format_ARGB32_Premultiplied)
+    rounded.fill(Qt.GlobalColor.transparent)
+
+    painter = QPainter(rounded)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    path = QPainterPath()
+    radius = THUMBNAIL_RADIUS * scale
+    path.addRoundedRect(0, 0, width, height, radius, radius)
+    painter.setClipPath(path)
+    painter.drawImage(0, 0, scaled)
+    painter.end()
+
+    rounded.setDevicePixelRatio(scale)
+    return rounded
+
+def make_favicon(image, scale=1):
+    size = FAVICON_SIZE * scale
+    favicon = image.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatio,
+                           Qt.TransformationMode.SmoothTransformation)
+    favicon = favicon.convertToFormat(QImage.Format.Format_ARGB32_Premultiplied)
+    favicon.setDevicePixelRatio(scale)
+    return favicon
+
+def image_to_png(image):
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    image.save(buffer, "PNG")
+    buffer.close()
+    return bytes(data)
+
+def render_derivatives(image, make):
+    """Renders every scale of one derivative; returns {scale: (image, png bytes)}."""
+    derivatives = {}
+    for scale in DERIVATIVE_SCALES:
+        derivative = make(image, scale)
+        derivatives[scale] = (derivative, image_to_png(derivative))
+    return derivatives
+
+def load_derivative(data, scale):
+    image = QImage.fromData(data)
+    if image.isNull():
+        return None
+    image.setDevicePixelRatio(scale)
+    return image
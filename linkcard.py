@@ -1,262 +1,420 @@
 from PyQt6.QtWidgets import *
-from PyQt6.QtGui import QPixmap, QDesktopServices, QImage, QCursor, QPainter, QPainterPath, QAction
-from PyQt6.QtCore import Qt, QUrl, QThreadPool
-import requests
+from PyQt6.QtGui import QPixmap, QPixmapCache, QDesktopServices, QImage, QColor, QPainter, QPen, QFont, QFontMetrics
+from PyQt6.QtCore import Qt, QUrl, QRect, QRectF, QSize, QTimer, QAbstractListModel, QModelIndex
+import time
 from utils import *
-from paths import get_data_file_path
 from preview_worker import *
+from repository import get_repository
+
+# Fetch priorities for rows relative to the viewport
+PRIORITY_VISIBLE = 2
+PRIORITY_NEAR = 1
+PRIORITY_OFFSCREEN = 0
+
+# Custom data roles exposed by LinkListModel
+EntryRole = Qt.ItemDataRole.UserRole + 1
+PreviewRole = Qt.ItemDataRole.UserRole + 2
+ThumbnailRole = Qt.ItemDataRole.UserRole + 3
+FaviconRole = Qt.ItemDataRole.UserRole + 4
+
+class LinkListModel(QAbstractListModel):
+    """List model over the links of one category.
+
+    Text comes from the preview stored with each entry, so rows render
+    without any I/O. Images (and previews that were never stored) are
+    requested from the fetch coordinator the first time a row is painted or
+    comes near the viewport; stale previews are refreshed in the background
+    and written back to the entry.
+
+    Rows are built incrementally: the model starts with the first batch of
+    ids and resolves the rest over later event-loop ticks, each tick capped
+    at FILL_BUDGET_SECONDS, so a window opens just as fast for a category of
+    100 000 links as for one of ten. The view can also pull rows early
+    through canFetchMore()/fetchMore() when the user scrolls ahead.
+    """
+
+    FIRST_BATCH = 64
+    RESOLVE_CHUNK = 256
+    FILL_BUDGET_SECONDS = 0.008
+
+    def __init__(self, link_ids, parent=None):
+        super().__init__(parent)
+        self.ids = list(link_ids)  # every row, in order; self.links holds the resolved prefix
+        self.links = []
+        self.rows_by_id = {}
+        self.state = {}        # link id -> {"preview", "thumbnail", "favicon", "requested", "images_for", "priority"}
+        self.pending = set()   # link ids to request on the next event-loop tick
+        self.request_timer = QTimer(self)
+        self.request_timer.setSingleShot(True)
+        self.request_timer.setInterval(0)
+        self.request_timer.timeout.connect(self.flush_requests)
+
+        self.fill_timer = QTimer(self)
+        self.fill_timer.setSingleShot(True)
+        self.fill_timer.setInterval(0)
+        self.fill_timer.timeout.connect(self.fill_tick)
+        self.load_rows(self.FIRST_BATCH)
+        if self.canFetchMore():
+            self.fill_timer.start()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.links)
+
+    # === Incremental loading ===
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and len(self.links) < len(self.ids)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not parent.isValid():
+            self.load_rows(self.RESOLVE_CHUNK)
+
+    def fill_tick(self):
+        deadline = time.monotonic() + self.FILL_BUDGET_SECONDS
+        while self.canFetchMore() and time.monotonic() < deadline:
+            self.load_rows(self.RESOLVE_CHUNK)
+        if self.canFetchMore():
+            self.fill_timer.start()
+
+    def load_rows(self, count):
+        start = len(self.links)
+        chunk = self.ids[start:start + count]
+        if not chunk:
+            return
+        entries = [entry for entry in get_repository().get_links(chunk) if entry is not None]
+        # Links deleted since the ids were read are dropped from the id list too
+        self.ids[start:start + len(chunk)] = [entry["id"] for entry in entries]
+        if not entries:
+            return
+        self.beginInsertRows(QModelIndex(), start, start + len(entries) - 1)
+        for row, entry in enumerate(entries, start):
+            self.rows_by_id[entry["id"]] = row
+        self.links.extend(entries)
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.links):
+            return None
+
+        entry = self.links[index.row()]
+        state = self.row_state(entry["id"])
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            preview = state["preview"]
+            return preview.get("title", entry["url"]) if preview else "Loading title..."
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return entry["url"]
+        if role == EntryRole:
+            return entry
+        if role == PreviewRole:
+            # Painting a row is what triggers its fetch
+            if not state["requested"]:
+                state["priority"] = max(state["priority"], PRIORITY_VISIBLE)
+                self.pending.add(entry["id"])
+                self.request_timer.start()
+            return state["preview"]
+        if role == ThumbnailRole:
+            return state["thumbnail"]
+        if role == FaviconRole:
+            return state["favicon"]
+        return None
+
+    def row_state(self, link_id):
+        if link_id not in self.state:
+            entry = self.links[self.row_of(link_id)]
+            self.state[link_id] = {"preview": embedded_preview(entry), "thumbnail": None, "favicon": None,
+                                   "requested": False, "images_for": None, "priority": PRIORITY_OFFSCREEN}
+        return self.state[link_id]
+
+    def row_of(self, link_id):
+        return self.rows_by_id.get(link_id, -1)
+
+    def owner(self, link_id):
+        # Compared by value in the coordinator, so a fresh tuple per call is fine
+        return (id(self), link_id)
+
+    # === Fetching ===
+
+    def flush_requests(self):
+        for link_id in list(self.pending):
+            row = self.row_of(link_id)
+            if row < 0:
+                continue
+            state = self.row_state(link_id)
+            if state["requested"]:
+                continue
+            state["requested"] = True
+            preview = state["preview"]
+            if preview is not None:
+                # Text is already on screen; only images and a stale refresh are left
+                self.request_images(link_id, preview)
+                if not is_preview_stale(preview):
+                    continue
+            get_fetch_coordinator().request_preview(
+                self.links[row]["url"],
+                lambda preview, link_id=link_id: self.preview_loaded(link_id, preview),
+                owner=self.owner(link_id), priority=state["priority"], preview=preview
+            )
+        self.pending.clear()
+
+    def request_images(self, link_id, preview):
+        state = self.row_state(link_id)
+        sources = (preview.get("thumbnail"), preview.get("favicon"))
+        if state["images_for"] == sources:
+            return
+        state["images_for"] = sources
+        get_fetch_coordinator().request_images(
+            self.links[self.row_of(link_id)]["url"],
+            lambda thumbnail, favicon, link_id=link_id: self.images_loaded(link_id, thumbnail, favicon),
+            owner=self.owner(link_id), priority=state["priority"], preview=preview
+        )
+
+    def update_priorities(self, priorities):
+        """Applies {row: priority}; rows near the viewport start fetching, others are demoted."""
+        coordinator = get_fetch_coordinator()
+        wanted = {self.links[row]["id"]: priority for row, priority in priorities.items() if row < len(self.links)}
+        for link_id, state in self.state.items():
+            priority = wanted.get(link_id, PRIORITY_OFFSCREEN)
+            if state["requested"] and state["priority"] != priority:
+                coordinator.set_priority(self.owner(link_id), priority)
+            state["priority"] = priority
+        for link_id, priority in wanted.items():
+            state = self.row_state(link_id)
+            state["priority"] = priority
+            if not state["requested"]:
+                self.pending.add(link_id)
+        if self.pending:
+            self.request_timer.start()
+
+    def preview_loaded(self, link_id, preview):
+        row = self.row_of(link_id)
+        if row < 0:
+            return
+        state = self.row_state(link_id)
+        preview = preview_for_entry(self.links[row], preview)
+        state["preview"] = preview
+        self.store_preview(row, preview)
+        self.emit_row_changed(row)
+        # A changed thumbnail or favicon URL means the images are fetched again
+        self.request_images(link_id, preview)
+
+    def store_preview(self, row, preview):
+        entry = self.links[row]
+        if preview.get("error") or preview == entry.get("preview"):
+            return
+        try:
+            get_repository().update_preview(entry["id"], preview)
+        except Exception as e:
+            print("Failed to store preview:", e)
+            return
+        self.links[row] = dict(entry, preview=preview)
 
-class LinkCard(QWidget):
-    thread_pool = QThreadPool.globalInstance()
-    delete_requested = pyqtSignal(str)
-
-    def __init__(self, url, tags=None):
-
-        super().__init__()
-        
-        self.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
-        self.customContextMenuRequested.connect(self.show_context_menu)
-
-        self.url = url
-        self.tags = tags or []
-        self.preview_data = None
+    def images_loaded(self, link_id, thumbnail_img, favicon_img):
+        row = self.row_of(link_id)
+        if row < 0:
+            return
+        state = self.row_state(link_id)
+        # Images arrive as display-ready derivatives; only the pixmap conversion happens here
+        state["thumbnail"] = None if thumbnail_img.isNull() else QPixmap.fromImage(thumbnail_img)
+        state["favicon"] = favicon_pixmap(favicon_img)
+        self.emit_row_changed(row)
+
+    def emit_row_changed(self, row):
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def cancel_all(self):
+        self.fill_timer.stop()
+        self.request_timer.stop()
+        self.pending.clear()
+        coordinator = get_fetch_coordinator()
+        for link_id in self.state:
+            coordinator.cancel(self.owner(link_id))
+
+    # === Edits ===
+
+    def apply_entry(self, entry):
+        """Takes a changed entry from the repository; stored previews replace the shown one."""
+        row = self.row_of(entry["id"])
+        if row < 0:
+            return
+        self.links[row] = entry
+        state = self.state.get(entry["id"])
+        preview = embedded_preview(entry)
+        if state is not None and preview is not None and preview != state["preview"]:
+            state["preview"] = preview
+            if state["requested"]:
+                self.request_images(entry["id"], preview)
+        self.emit_row_changed(row)
+
+    def append_entry(self, entry):
+        if self.canFetchMore():
+            # Still filling in; the new link is resolved with the rest
+            self.ids.append(entry["id"])
+            return
+        row = len(self.links)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.ids.append(entry["id"])
+        self.links.append(entry)
+        self.rows_by_id[entry["id"]] = row
+        self.endInsertRows()
+
+    def forget_id(self, link_id):
+        """Drops a link that has not been resolved into a row yet."""
+        if link_id in self.ids[len(self.links):]:
+            self.ids.remove(link_id)
+
+    def remove_row(self, row):
+        link_id = self.links[row]["id"]
+        get_fetch_coordinator().cancel(self.owner(link_id))
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.links[row]
+        del self.ids[row]
+        self.rows_by_id = {entry["id"]: row for row, entry in enumerate(self.links)}
+        self.state.pop(link_id, None)
+        self.pending.discard(link_id)
+        self.endRemoveRows()
+
+def favicon_pixmap(favicon_img):
+    if favicon_img is None or favicon_img.isNull():
+        return None
+
+    # Shared favicon QImages are converted once
+    key = f"favicon-{favicon_img.cacheKey()}"
+    pixmap = QPixmapCache.find(key)
+    if pixmap is None:
+        pixmap = QPixmap.fromImage(favicon_img)
+        QPixmapCache.insert(key, pixmap)
+    return pixmap
+
+class LinkCardDelegate(QStyledItemDelegate):
+    """Paints a link card (favicon, title, open button, tags, thumbnail, description) for one row."""
+
+    ROW_HEIGHT = 230
+    MARGIN = 10
+    TITLE_HEIGHT = 44
+    TAGS_HEIGHT = 38
+    CONTENT_HEIGHT = 112
+    THUMB_SIZE = QSize(160, 100)
+    BUTTON_SIZE = QSize(96, 40)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.title_font = QFont()
+        self.title_font.setPixelSize(20)
+        self.title_font.setBold(True)
+        self.button_font = QFont()
+        self.button_font.setPixelSize(18)
+        self.tag_font = QFont()
+        self.tag_font.setPixelSize(15)
+        self.desc_font = QFont()
+        self.desc_font.setPixelSize(14)
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.ROW_HEIGHT)
+
+    def card_rect(self, rect):
+        return rect.adjusted(6, 4, -6, -4)
+
+    def button_rect(self, rect):
+        card = self.card_rect(rect)
+        return QRect(
+            card.right() - self.MARGIN - self.BUTTON_SIZE.width(),
+            card.top() + self.MARGIN + (self.TITLE_HEIGHT - self.BUTTON_SIZE.height()) // 2,
+            self.BUTTON_SIZE.width(), self.BUTTON_SIZE.height()
+        )
+
+    def paint(self, painter, option, index):
+        entry = index.data(EntryRole)
+        if entry is None:
+            return
+        preview = index.data(PreviewRole)
+        thumbnail = index.data(ThumbnailRole)
+        favicon = index.data(FaviconRole)
 
-        # === Title ===
-        self.title_label = QLabel("<b>Loading title...</b>")
-        self.title_label.setStyleSheet("font-size: 22px; font-weight: bold;")
-        self.title_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
 
-        self.favicon_label = QLabel()
-        self.favicon_label.setFixedSize(24, 24)  # Increased size
-        self.favicon_label.setScaledContents(True)
+        card = self.card_rect(option.rect)
+        hovered = bool(option.state & QStyle.StateFlag.State_MouseOver)
+        painter.setPen(QPen(QColor("#d0d0d0")))
+        painter.setBrush(QColor(0, 120, 215, 20) if hovered else Qt.BrushStyle.NoBrush)
+        painter.drawRoundedRect(QRectF(card), 8, 8)
 
-        # === Open Button ===
-        self.open_button = QPushButton("Open")
-        self.open_button.setCursor(Qt.CursorShape.PointingHandCursor)
-        self.open_button.setStyleSheet("""
-            QPushButton {
-                background-color: #0078D7;
-                color: white;
-                padding: 10px 16px;
-                border-radius: 6px;
-                font-size: 22px;
-            }
-            QPushButton:hover {
-                background-color: #005A9E;
-            }
-        """)
-        self.open_button.clicked.connect(lambda: QDesktopServices.openUrl(QUrl(self.url)))
+        x = card.left() + self.MARGIN
+        y = card.top() + self.MARGIN
+        inner_right = card.right() - self.MARGIN
 
         # === Title Row ===
-        title_row = QHBoxLayout()
-        title_row.setSpacing(8)
-        title_with_icon = QHBoxLayout()
-        title_with_icon.addWidget(self.favicon_label)
-        title_with_icon.addWidget(self.title_label)
-        title_with_icon.addStretch()
+        if favicon is not None:
+            painter.drawPixmap(QRect(x, y + (self.TITLE_HEIGHT - 24) // 2, 24, 24), favicon)
+        title_left = x + 32
+        button = self.button_rect(option.rect)
+        title_rect = QRect(title_left, y, button.left() - 8 - title_left, self.TITLE_HEIGHT)
+        painter.setFont(self.title_font)
+        painter.setPen(option.palette.color(option.palette.ColorRole.Text))
+        title = index.data(Qt.ItemDataRole.DisplayRole)
+        elided = QFontMetrics(self.title_font).elidedText(title, Qt.TextElideMode.ElideRight, title_rect.width())
+        painter.drawText(title_rect, Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft, elided)
 
-        title_row.addLayout(title_with_icon)
-        title_row.addWidget(self.open_button)
+        # === Open Button ===
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor("#005A9E") if hovered else QColor("#0078D7"))
+        painter.drawRoundedRect(QRectF(button), 6, 6)
+        painter.setFont(self.button_font)
+        painter.setPen(QColor("white"))
+        painter.drawText(button, Qt.AlignmentFlag.AlignCenter, "Open")
 
         # === Tags Row ===
-        self.tags_widget = QWidget()
-        self.tags_layout = QHBoxLayout()
-        self.tags_layout.setSpacing(6)
-        self.tags_layout.setContentsMargins(0, 0, 0, 0)
-        self.tags_layout.setAlignment(Qt.AlignmentFlag.AlignLeft)
-
-        for tag in self.tags:
-            tag_label = QLabel(tag)
-            tag_label.setSizePolicy(QSizePolicy.Policy.Maximum, QSizePolicy.Policy.Fixed)
-            tag_label.setStyleSheet("""
-                color: #020202;
-                background-color: #f0f0f0;
-                border-radius: 8px;
-                padding: 4px 8px;
-                font-size: 20px;
-                margin: 4px;
-            """)
-            self.tags_layout.addWidget(tag_label)
-        self.tags_widget.setLayout(self.tags_layout)
-
-        # === Description ===
-        self.desc_label = QLabel("Fetching preview...")
-        self.desc_label.setWordWrap(True)
-        self.desc_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
-        self.desc_label.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Preferred)
-        self.desc_label.setMaximumHeight(500)
-        self.desc_label.setStyleSheet("border: none; background: transparent; padding: 4px;")
-
-        # === Thumbnail ===
-        self.thumbnail_label = QLabel("No Image")
-        self.thumbnail_label.setFixedSize(120, 90)
-        self.thumbnail_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.thumbnail_label.setScaledContents(True)
-        self.thumbnail_label.setStyleSheet("border: none; background: transparent; padding: 4px;")
-
-        # === Content (Thumbnail + Description) with border ===
-        content_inner_layout = QHBoxLayout()
-        content_inner_layout.addWidget(self.thumbnail_label)
-        content_inner_layout.addWidget(self.desc_label)
-
-        self.content_frame = QFrame()
-        self.content_frame.setStyleSheet("""
-            QFrame {
-                border: 1px solid #d0d0d0;
-                border-radius: 6px;
-            }
-        """)
-        self.content_frame.setLayout(content_inner_layout)
-
-        # === Final Layout ===
-        main_layout = QVBoxLayout()
-        main_layout.setSpacing(6)
-        main_layout.setContentsMargins(10, 10, 10, 10)
-        main_layout.addLayout(title_row)
-        main_layout.addWidget(self.tags_widget)
-        main_layout.addWidget(self.content_frame)
-
-        self.setLayout(main_layout)
-        self.load_preview()
-
-    def show_context_menu(self, position):
-        menu = QMenu(self)
-
-        modify_action = QAction("Modify Tags", self)
-        modify_action.triggered.connect(self.modify_tags)
-
-        delete_action = QAction("Delete Link", self)
-        delete_action.triggered.connect(self.delete_link)
-
-        menu.addAction(modify_action)
-        menu.addSeparator()
-        menu.addAction(delete_action)
-
-        menu.exec(self.mapToGlobal(position))
-
-    def modify_tags(self):
-        current_tags = ", ".join(self.tags)
-        new_tags, ok = QInputDialog.getText(self, "Modify Tags", "Enter new tags :", text=current_tags)
-        if not ok:
-            return
-        
-        self.tags = [tag.strip() for tag in new_tags.split(",") if tag.strip()]
-
-        # Refresh tag labels
-        while self.tags_layout.count():
-            widget = self.tags_layout.takeAt(0).widget()
-            if widget:
-                widget.deleteLater()
-        for tag in self.tags:
-            tag_label = QLabel(tag)
-            tag_label.setSizePolicy(QSizePolicy.Policy.Maximum, QSizePolicy.Policy.Fixed)
-            tag_label.setStyleSheet("""
-                color: #020202;
-                background-color: #f0f0f0;
-                border-radius: 8px;
-                padding: 4px 8px;
-                font-size: 20px;
-                margin: 4px;
-            """)
-            self.tags_layout.addWidget(tag_label)
-        
-        # Persist changes into the files
-        try:
-            file_path = get_data_file_path()
-            if not os.path.exists(file_path):
-                return
-
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-
-            # Find and update the matching link by URL
-            for entry in data:
-                if entry.get("url") == self.url:
-                    entry["tags"] = self.tags
-                    break
-
-            # Save the updated data
-            with open(file_path, 'w') as f:
-                json.dump(data, f, indent=4)
-
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"Failed to update tags:\n{str(e)}")
-
-
-    def delete_link(self):
-        confirm = QMessageBox.question(self, "Delete Link",
-        f"Are you sure you want to delete this link?\n{self.url}",
-        QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
-        if confirm == QMessageBox.StandardButton.Yes:
-            try:
-                cache_folder = get_cache_folder_for_url(self.url)
-                if os.path.exists(cache_folder):
-                    import shutil
-                    shutil.rmtree(cache_folder)
-            except Exception as e:
-                QMessageBox.warning(self, "Cache Deletion Failed", f"Failed to delete cached data:\n{str(e)}")
-            
-            self.delete_requested.emit(self.url)
-
-    def load_preview(self):
-        worker = PreviewWorker(self.url)
-        worker.signals.finished.connect(self.set_preview_data)
-        LinkCard.thread_pool.start(worker)
-
-    def set_preview_data(self, preview):
-        self.title_label.setText(f"<b>{preview.get('title', self.url)}</b>")
-        
-        description = preview.get("description", "")
-        if description:
-            self.desc_label.setText(description)
-            self.desc_label.show()
-        else:
-            self.desc_label.hide()
-
-        self.thumbnail_label.setText("Loading...")
-        self.favicon_label.clear()
-
-        # === Load Images from Disk in Background Thread ===
-        cache_folder = get_cache_folder_for_url(self.url)
-        image_worker = ImageLoaderWorker(cache_folder)
-        image_worker.signals.finished.connect(self.set_images_from_cache)
-        LinkCard.thread_pool.start(image_worker)
-    
-    def set_images_from_cache(self, thumbnail_img, favicon_img):
-        # Handle thumbnail
-        if thumbnail_img and not thumbnail_img.isNull():
-            # Resize and apply rounded corners
-            image = thumbnail_img.scaled(160, 100, Qt.AspectRatioMode.KeepAspectRatioByExpanding,
-                                        Qt.TransformationMode.SmoothTransformation)
-
-            rounded_pixmap = QPixmap(image.size())
-            rounded_pixmap.fill(Qt.GlobalColor.transparent)
-
-            painter = QPainter(rounded_pixmap)
-            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-
-            path = QPainterPath()
-            radius = 12
-            path.addRoundedRect(0, 0, image.width(), image.height(), radius, radius)
-            painter.setClipPath(path)
-            painter.drawPixmap(0, 0, QPixmap.fromImage(image))
-            painter.end()
-            
-            self.thumbnail_label.setPixmap(rounded_pixmap)
-            self.thumbnail_label.show()
-        else:
-            self.thumbnail_label.hide()
-
-        # Handle favicon
-        if favicon_img and not favicon_img.isNull():
-            pixmap = QPixmap(favicon_img).scaled(24, 24, Qt.AspectRatioMode.KeepAspectRatio,
-                                                Qt.TransformationMode.SmoothTransformation)
-            self.favicon_label.setPixmap(pixmap)
-        else:
-            self.favicon_label.clear()
-        
-        # Final cleanup: if both are hidden, also hide the content_frame (optional)
-        if self.thumbnail_label.isHidden() and self.desc_label.isHidden():
-            self.content_frame.hide()  # This hides the whole content_frame
+        y += self.TITLE_HEIGHT + 4
+        painter.setFont(self.tag_font)
+        metrics = QFontMetrics(self.tag_font)
+        tag_x = x
+        for tag in entry.get("tags", []):
+            width = metrics.horizontalAdvance(tag) + 16
+            if tag_x + width > inner_right:
+                break
+            tag_rect = QRect(tag_x, y + 4, width, self.TAGS_HEIGHT - 8)
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(QColor("#f0f0f0"))
+            painter.drawRoundedRect(QRectF(tag_rect), 8, 8)
+            painter.setPen(QColor("#020202"))
+            painter.drawText(tag_rect, Qt.AlignmentFlag.AlignCenter, tag)
+            tag_x += width + 8
+
+        # === Content (Thumbnail + Description) ===
+        y += self.TAGS_HEIGHT
+        if preview is None:
+            description = "Fetching preview..."
         else:
-            self.content_frame.show()
\ No newline at end of file
+            description = preview.get("description", "")
+
+        if thumbnail is not None or description:
+            content = QRect(x, y, inner_right - x, self.CONTENT_HEIGHT - 6)
+            painter.setPen(QPen(QColor("#d0d0d0")))
+            painter.setBrush(Qt.BrushStyle.NoBrush)
+            painter.drawRoundedRect(QRectF(content), 6, 6)
+
+            text_left = content.left() + 8
+            if thumbnail is not None:
+                thumb_rect = QRect(content.left() + 4, content.top() + 2, self.THUMB_SIZE.width(), self.THUMB_SIZE.height())
+                painter.drawPixmap(thumb_rect.topLeft(), thumbnail)
+                text_left = thumb_rect.right() + 10
+
+            if description:
+                painter.setFont(self.desc_font)
+                painter.setPen(option.palette.color(option.palette.ColorRole.Text))
+                desc_rect = QRect(text_left, content.top() + 6, content.right() - 6 - text_left, content.height() - 12)
+                painter.drawText(desc_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop | Qt.TextFlag.TextWordWrap, description)
+
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        # The painted "Open" button behaves like a real one
+        if event.type() == event.Type.MouseButtonRelease and event.button() == Qt.MouseButton.LeftButton:
+            if self.button_rect(option.rect).contains(event.position().toPoint()):
+                entry = index.data(EntryRole)
+                if entry:
+                    QDesktopServices.openUrl(QUrl(entry["url"]))
+                return True
+        return super().editorEvent(event, model, option, index)
@@ -1,34 +1,67 @@
+import time
+STARTUP_STARTED = time.perf_counter()
+
 from PyQt6.QtWidgets import *
-from PyQt6.QtGui import QCursor, QIcon, QPainter, QColor, QPen, QBrush, QAction
-from PyQt6.QtCore import Qt, QSize, QRect, QPoint
+from PyQt6.QtGui import QCursor, QIcon, QPainter, QColor, QPen, QBrush, QAction, QDesktopServices
+from PyQt6.QtCore import Qt, QSize, QRect, QPoint, QTimer, QUrl, QObject, QEvent, pyqtSignal
 import sys, os, json
 from paths import *
-from utils import get_cache_folder_for_url
+from settings import get_setting
+from repository import get_repository
+from storage import close_store
+from snapshot import load_snapshot, save_snapshot
+
+# Only the light grid widgets are imported up front; fetching, caching, image
+# processing and the link windows are imported the first time they are needed.
+from cards import PlusButton, CategoryCard, save_scaled_icon
 
-from widgets import PlusButton, AddLinkWindow, CategoryCard, CategoryLinksWindow
+GRID_COLUMNS = 4
 
 class MainWindow(QWidget):
+    first_painted = pyqtSignal(float)  # milliseconds since the process started
+
     def __init__(self):
         super().__init__()
+        self.painted = False
         self.setWindowTitle("Stashly - Smart Link Manager")
         self.resize(1400, 800)
 
         # Layout for main screen
         self.main_layout = QVBoxLayout(self)
 
+        # Search box; results replace the category grid while a query is typed
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search links by title, description, tag or URL...")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.setStyleSheet("font-size: 16px; padding: 8px; margin: 10px 20px 0 20px;")
+        self.main_layout.addWidget(self.search_input)
+
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.run_search)
+        self.search_input.textChanged.connect(self.search_timer.start)
+        self.search_input.returnPressed.connect(self.open_first_search_result)
+
+        self.search_results = QListWidget()
+        self.search_results.setStyleSheet("font-size: 14px;")
+        self.search_results.itemActivated.connect(self.open_search_result)
+        self.search_results.hide()
+        self.main_layout.addWidget(self.search_results)
+
         # Grid layout for category cards inside a scroll area
         self.category_grid = QGridLayout()
         self.category_grid.setSpacing(20)
         self.category_grid.setContentsMargins(20, 20, 20, 20)
 
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
+        self.scroll_area = QScrollArea()
+        self.scroll_area.setWidgetResizable(True)
 
         scroll_content = QWidget()
         scroll_content.setLayout(self.category_grid)
-        scroll_area.setWidget(scroll_content)
+        self.scroll_area.setWidget(scroll_content)
 
-        self.main_layout.addWidget(scroll_area)
+        self.main_layout.addWidget(self.scroll_area)
 
         # Create the plus button
         self.plus_button = PlusButton(self)
@@ -36,7 +69,41 @@ class MainWindow(QWidget):
 
         self.plus_button.clicked.connect(self.show_add_link_window)
 
+        self.category_cards = {}  # category name -> CategoryCard in the grid
+        self.category_order = []  # names in grid order
+
+        # Data changes are coalesced and applied to the grid as a diff
+        self.sync_timer = QTimer(self)
+        self.sync_timer.setSingleShot(True)
+        self.sync_timer.setInterval(0)
+        self.sync_timer.timeout.connect(self.reload_categories)
+
+        # Paint from last run's snapshot; the link store is read after the first paint
+        snapshot = load_snapshot()
+        if snapshot is None:
+            self.finish_startup()
+        else:
+            self.apply_categories([name for name, _ in snapshot], dict(snapshot))
+            # A zero timer would fire before the window is first exposed; wait for the paint
+            self.first_painted.connect(lambda elapsed_ms: self.finish_startup())
+
+    def finish_startup(self):
+        # Reconcile the snapshot with the store, then follow its changes
+        from events import get_repository_signals
         self.load_categories()
+        signals = get_repository_signals()
+        # Updates (previews, tags) never change categories or counts, and would
+        # otherwise rebuild open search results under the user on every fetch
+        for signal in (signals.link_added, signals.link_deleted,
+                       signals.categories_changed, signals.reloaded):
+            signal.connect(lambda *args: self.sync_timer.start())
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.painted:
+            self.painted = True
+            elapsed_ms = (time.perf_counter() - STARTUP_STARTED) * 1000
+            QTimer.singleShot(0, lambda: self.first_painted.emit(elapsed_ms))
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
@@ -49,38 +116,112 @@ class MainWindow(QWidget):
         self.plus_button.move(x, y)
 
     def show_add_link_window(self):
+        from widgets import AddLinkWindow
         self.add_window = AddLinkWindow()
-        self.add_window.link_saved.connect(self.reload_categories)
         self.add_window.move(
             self.geometry().center() - self.add_window.rect().center()
         )
         self.add_window.show()
 
-    def load_categories(self):
-        file_path = get_data_file_path()
-        if not os.path.exists(file_path):
+    def run_search(self, keep_selection=False):
+        query = self.search_input.text().strip()
+        current = self.search_results.currentItem()
+        selected_url = current.data(Qt.ItemDataRole.UserRole) if keep_selection and current else None
+        scroll_value = self.search_results.verticalScrollBar().value()
+        self.search_results.clear()
+
+        if not query:
+            self.search_results.hide()
+            self.scroll_area.show()
             return
 
+        for entry in get_repository().search(query, limit=100):
+            preview = entry.get("preview") or {}
+            title = entry.get("title") or preview.get("title") or entry["url"]
+            item = QListWidgetItem(f"{title}\n{entry['url']}")
+            item.setData(Qt.ItemDataRole.UserRole, entry["url"])
+            tags = ", ".join(entry.get("tags", []))
+            item.setToolTip(f"{entry.get('category', '')}" + (f" | {tags}" if tags else ""))
+            self.search_results.addItem(item)
+
+        if self.search_results.count() == 0:
+            self.search_results.addItem(QListWidgetItem("No matching links"))
+
+        # A refresh after a data change keeps the user's place in the list
+        if keep_selection:
+            for i in range(self.search_results.count()):
+                item = self.search_results.item(i)
+                if selected_url and item.data(Qt.ItemDataRole.UserRole) == selected_url:
+                    self.search_results.setCurrentItem(item)
+                    break
+            self.search_results.verticalScrollBar().setValue(scroll_value)
+
+        self.scroll_area.hide()
+        self.search_results.show()
+
+    def open_search_result(self, item):
+        url = item.data(Qt.ItemDataRole.UserRole)
+        if url:
+            QDesktopServices.openUrl(QUrl(url))
+
+    def open_first_search_result(self):
+        self.search_timer.stop()
+        self.run_search()
+        if self.search_results.count():
+            self.open_search_result(self.search_results.item(0))
+
+    def load_categories(self):
+        """Brings the grid in line with the repository, touching only cards that changed."""
         try:
-            with open(file_path, 'r') as f:
-                data = json.load(f)
+            repository = get_repository()
+            categories = repository.categories()
+            counts = repository.category_counts()
         except Exception as e:
             print("Error loading categories:", e)
             return
+        self.apply_categories(categories, counts)
+        save_snapshot((category, counts.get(category, 0)) for category in categories)
 
-        categories = set()
-        for entry in data:
-            if cat := entry.get("category", "").strip():
-                categories.add(cat)
-
-        # Populate grid
-        for i, category in enumerate(sorted(categories)):
-            row, col = divmod(i, 4)
-            card = CategoryCard(category)  # Can add icon support later
-            card.clicked.connect(self.open_category_links)
-            card.rightclicked.connect(self.show_category_context_menu)
+    def apply_categories(self, categories, counts):
+        for category, card in self.category_cards.items():
+            card.set_count(counts.get(category))
+        if categories == self.category_order:
+            return
+
+        # Remove cards of categories that are gone
+        wanted = set(categories)
+        for name in [name for name in self.category_cards if name not in wanted]:
+            card = self.category_cards.pop(name)
+            self.category_grid.removeWidget(card)
+            card.deleteLater()
+
+        # Add new cards and move only those whose cell changed
+        old_positions = {name: i for i, name in enumerate(self.category_order)}
+        for i, category in enumerate(categories):
+            card = self.category_cards.get(category)
+            if card is None:
+                card = self.create_category_card(category, counts.get(category))
+            elif old_positions.get(category) == i:
+                continue
+            else:
+                self.category_grid.removeWidget(card)
+            row, col = divmod(i, GRID_COLUMNS)
             self.category_grid.addWidget(card, row, col)
-    
+
+        self.category_order = categories
+
+    def create_category_card(self, category, count=None):
+        card = CategoryCard(category, count=count)
+        card.clicked.connect(self.open_category_links)
+        card.rightclicked.connect(self.show_category_context_menu)
+        self.category_cards[category] = card
+        return card
+
+    def update_category_card(self, category):
+        card = self.category_cards.get(category)
+        if card is not None:
+            card.load_icon()
+
     def show_category_context_menu(self, category_name):
         menu = QMenu(self)
 
@@ -110,25 +251,9 @@ class MainWindow(QWidget):
         if new_name == category_name:
             return
         
-        # === Step 1: Update data file ===
-        file_path = get_data_file_path()
-        if not os.path.exists(file_path):
-            QMessageBox.warning(self, "Error", "Data file not found")
-            return
-        
+        # === Step 1: Update link repository ===
         try:
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-            
-            updated = False
-            for entry in data:
-                if entry.get("category") == category_name:
-                    entry["category"] = new_name
-                    updated = True
-            
-            if updated:
-                with open(file_path, "w") as f:
-                    json.dump(data, f, indent=2)
+            get_repository().rename_category(category_name, new_name)
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to rename category: {e}")
             return
@@ -157,8 +282,8 @@ class MainWindow(QWidget):
                 break
 
         
-        # === Step 4: Reload UI ===
-        self.reload_categories()
+        # === Step 4: Update UI (the grid itself follows the repository change) ===
+        self.update_category_card(new_name)
 
         QMessageBox.information(self, "Category Renamed", f"'{category_name}' was renamed to '{new_name}' successfully.")
 
@@ -170,33 +295,20 @@ class MainWindow(QWidget):
         if confirm != QMessageBox.StandardButton.Yes:
             return
         
-        # === Step 1: Delete from data file ===
-        file_path = get_data_file_path()
-        if os.path.exists(file_path):
-            try:
-                with open(file_path, 'r') as f:
-                    data = json.load(f)
-                
-                # Get URLs of links to be deleted
-                links_to_delete = [entry for entry in data if entry.get("category") == category_name]
-                new_data = [entry for entry in data if entry.get("category") != category_name]
-
-                # Delete cache for each URL
-                for link in links_to_delete:
-                    url = link.get("url", "")
-                    cache_folder = get_cache_folder_for_url(url)
-                    if os.path.exists(cache_folder):
-                        try:
-                            shutil.rmtree(cache_folder)
-                        except Exception as e:
-                            print(f"Warning: Failed to delete cache for {url}: {e}")
-
-                with open(file_path, 'w') as f:
-                    json.dump(new_data, f, indent=2)
+        # === Step 1: Delete from link repository ===
+        try:
+            deleted_urls = get_repository().delete_category(category_name)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to delete category from data: {e}")
+            return
 
+        # Delete cache for each URL
+        from utils import delete_cached_link
+        for url in deleted_urls:
+            try:
+                delete_cached_link(url)
             except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to delete category from data: {e}")
-                return
+                print(f"Warning: Failed to delete cache for {url}: {e}")
 
         # === Step 2: Remove icon from mapping ===
         icon_mapping = load_icon_mapping()
@@ -219,8 +331,7 @@ class MainWindow(QWidget):
                 except Exception as e:
                     print(f"Warning: Failed to delete icon file: {e}")
 
-        # === Step 4: Reload UI ===
-        self.reload_categories()
+        # === Step 4: The grid drops the card when the repository reports the change ===
 
         # === Step 5: Show confirmation ===
         QMessageBox.information(
@@ -235,42 +346,106 @@ class MainWindow(QWidget):
             icon_dir = get_icons_dir()
             mapping = load_icon_mapping()
 
-            ext = os.path.splitext(file_path)[1]
-            icon_filename = f"{slugify(category_name)}{ext}"
-            destination = os.path.join(icon_dir, icon_filename)
+            # Icons are stored pre-scaled as PNG, whatever format was picked
+            destination = os.path.join(icon_dir, f"{slugify(category_name)}.png")
 
             try:
-                shutil.copyfile(file_path, destination)
+                save_scaled_icon(file_path, destination)
+                for ext in [".jpg", ".jpeg", ".webp"]:
+                    stale_copy = os.path.join(icon_dir, f"{slugify(category_name)}{ext}")
+                    if os.path.exists(stale_copy):
+                        os.remove(stale_copy)
                 mapping[category_name] = destination
                 save_icon_mapping(mapping)
                 QMessageBox.information(self, "Success", f"Icon updated for '{category_name}'.")
 
-                # Trigger UI reload
-                self.reload_categories()
+                # Only this card's icon changes
+                self.update_category_card(category_name)
 
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to set icon: {str(e)}")
 
 
     def reload_categories(self):
-        # Step 1: Clear current category list
-        for i in reversed(range(self.category_grid.count())):
-            widget = self.category_grid.itemAt(i).widget()
-            if widget is not None:
-                widget.setParent(None)
-
-        # Step 2: Re-load categories from disk
+        # Step 1: Apply the category diff to the grid
         self.load_categories()
 
+        # Step 2: Keep visible search results in sync with the change
+        if self.search_input.text().strip():
+            self.run_search(keep_selection=True)
+
     def open_category_links(self, category_name):
+        from widgets import CategoryLinksWindow
         self.link_window = CategoryLinksWindow(category_name)
         self.link_window.show()
 
-if __name__ == "__main__":
+class UserActivityFilter(QObject):
+    """Application-wide event filter that tells the prefetch crawler the user is busy."""
 
-    get_cache_dir()
+    ACTIVITY_EVENTS = {
+        QEvent.Type.MouseButtonPress, QEvent.Type.KeyPress,
+        QEvent.Type.Wheel, QEvent.Type.MouseMove,
+    }
+
+    def __init__(self, crawler):
+        super().__init__()
+        self.crawler = crawler
+
+    def eventFilter(self, obj, event):
+        if event.type() in self.ACTIVITY_EVENTS:
+            self.crawler.touch()
+        return False
+
+def start_background_services(app):
+    """Everything that can wait until the main window is on screen."""
+    from cache import get_cache_store, CacheMaintenance
+    from prefetch import PrefetchCrawler
+    from pools import print_pool_stats
+
+    # Opens the cache pack (and migrates old cache folders on first run)
+    cache = get_cache_store()
+    app.aboutToQuit.connect(print_pool_stats)
+
+    # Orphan collection and LRU eviction run off the GUI thread
+    cache_maintenance = CacheMaintenance(cache, lambda: [entry["url"] for entry in get_repository().all_links()])
+    cache_maintenance.start()
+    app.background_services.append(cache_maintenance)
+
+    # Warm the cache for unopened links, backing off whenever the user is active
+    prefetch_crawler = PrefetchCrawler()
+    app.activity_filter = UserActivityFilter(prefetch_crawler)
+    app.installEventFilter(app.activity_filter)
+    prefetch_crawler.start()
+    app.background_services.append(prefetch_crawler)
+
+def stop_background_services(app, timeout=5):
+    # Must finish before the link store closes: both threads may still be writing to it
+    services = getattr(app, "background_services", [])
+    for service in services:
+        service.stop()
+    for service in services:
+        service.join(timeout)
+        if service.is_alive():
+            print(f"Warning: {service.name} did not stop within {timeout}s")
+
+def report_startup(elapsed_ms):
+    target_ms = get_setting("startup_target_ms")
+    if elapsed_ms > target_ms or "--startup-report" in sys.argv:
+        print(f"Startup: first paint after {elapsed_ms:.0f} ms (target {target_ms} ms)")
+
+if __name__ == "__main__":
 
     app = QApplication(sys.argv)
+    app.background_services = []
+    # aboutToQuit slots run in connection order: stop writers, then close the store
+    app.aboutToQuit.connect(lambda: stop_background_services(app))
+    app.aboutToQuit.connect(close_store)
     window = MainWindow()
+    window.first_painted.connect(report_startup)
+    if "--startup-report" in sys.argv:
+        # Used by startup_report.py: measure the first paint, then exit
+        window.first_painted.connect(lambda elapsed_ms: app.quit())
+    else:
+        window.first_painted.connect(lambda elapsed_ms: start_background_services(app))
     window.show()
     sys.exit(app.exec())
@@ -2,6 +2,7 @@ import os
 import json
 import platform
 import shutil
+import tempfile
 
 def get_base_dir():
     if platform.system() == "Windows":
@@ -17,19 +18,63 @@ def get_icons_dir():
     os.makedirs(icon_dir, exist_ok=True)
     return icon_dir
 
+def get_settings_file():
+    return os.path.join(get_base_dir(), "settings.json")
+
 def get_icon_mapping_file():
     return os.path.join(get_base_dir(), "icons.json")
 
+def get_scaled_icons_dir():
+    scaled_dir = os.path.join(get_icons_dir(), ".scaled")
+    os.makedirs(scaled_dir, exist_ok=True)
+    return scaled_dir
+
+def get_snapshot_file():
+    return os.path.join(get_base_dir(), "startup.json")
+
+# icons.json is parsed once and kept in memory; the mtime catches edits made elsewhere
+_icon_mapping = None
+_icon_mapping_mtime = None
+
 def load_icon_mapping():
+    """Returns a copy of the category -> icon path mapping."""
+    global _icon_mapping, _icon_mapping_mtime
     path = get_icon_mapping_file()
-    if os.path.exists(path):
-        with open(path, 'r') as f:
-            return json.load(f)
-    return {}
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = None
+    if _icon_mapping is None or mtime != _icon_mapping_mtime:
+        mapping = {}
+        if mtime is not None:
+            with open(path, 'r') as f:
+                mapping = json.load(f)
+        _icon_mapping, _icon_mapping_mtime = mapping, mtime
+    return dict(_icon_mapping)
 
 def save_icon_mapping(mapping):
-    with open(get_icon_mapping_file(), 'w') as f:
-        json.dump(mapping, f, indent=2)
+    global _icon_mapping, _icon_mapping_mtime
+    path = get_icon_mapping_file()
+    atomic_write_json(path, mapping)
+    _icon_mapping, _icon_mapping_mtime = dict(mapping), os.path.getmtime(path)
+
+def atomic_write_bytes(path, data):
+    # Write a unique temp file next to the target, flush to disk, then swap it in with one rename.
+    # Readers see either the old or the new file, never a half-written one.
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def atomic_write_json(path, data, **kwargs):
+    kwargs.setdefault("indent", 2)
+    atomic_write_bytes(path, json.dumps(data, **kwargs).encode("utf-8"))
 
 def slugify(text):
     return "".join(c if c.isalnum() else "_" for c in text.lower())
@@ -45,8 +90,14 @@ def get_data_file_path():
 
     return file_path
 
+def get_db_file_path():
+    return os.path.join(get_base_dir(), "links.db")
+
 def get_cache_dir():
     base_dir = get_base_dir()
     cache_dir = os.path.join(base_dir, "cache")
     os.makedirs(cache_dir, exist_ok=True)
-    return cache_dir
\ No newline at end of file
+    return cache_dir
+
+def get_cache_db_path():
+    return os.path.join(get_base_dir(), "cache.db")
\ No newline at end of file
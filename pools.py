@@ -0,0 +1,108 @@
+from PyQt6.QtCore import QRunnable, QThreadPool
+from collections import deque
+import os, threading, time
+
+from settings import get_setting
+
+class TimedRunnable(QRunnable):
+    """Runs a worker on behalf of an InstrumentedPool and reports its timings."""
+
+    def __init__(self, pool, worker):
+        super().__init__()
+        self.pool = pool
+        self.worker = worker
+        self.queued_at = time.monotonic()
+
+    def run(self):
+        started = time.monotonic()
+        self.pool.task_started(started - self.queued_at)
+        try:
+            self.worker.run()
+        finally:
+            self.pool.task_finished(time.monotonic() - started)
+
+class InstrumentedPool:
+    """QThreadPool that tracks queue depth, active tasks and per-task latency."""
+
+    def __init__(self, name, size):
+        self.name = name
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(size)
+        self.lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.waits = deque(maxlen=500)     # seconds between start() and run, most recent tasks
+        self.run_times = deque(maxlen=500) # seconds spent running, most recent tasks
+
+    def maxThreadCount(self):
+        return self.pool.maxThreadCount()
+
+    def start(self, worker, priority=0):
+        with self.lock:
+            self.queued += 1
+        self.pool.start(TimedRunnable(self, worker), priority)
+
+    def task_started(self, wait):
+        with self.lock:
+            self.queued -= 1
+            self.active += 1
+            self.waits.append(wait)
+
+    def task_finished(self, run_time):
+        with self.lock:
+            self.active -= 1
+            self.completed += 1
+            self.run_times.append(run_time)
+
+    def stats(self):
+        with self.lock:
+            waits = sorted(self.waits)
+            run_times = sorted(self.run_times)
+            return {
+                "name": self.name,
+                "threads": self.pool.maxThreadCount(),
+                "queued": self.queued,
+                "active": self.active,
+                "completed": self.completed,
+                "wait_ms_p50": percentile_ms(waits, 0.5),
+                "wait_ms_p95": percentile_ms(waits, 0.95),
+                "run_ms_p50": percentile_ms(run_times, 0.5),
+                "run_ms_p95": percentile_ms(run_times, 0.95),
+            }
+
+    def describe(self):
+        s = self.stats()
+        return (f"{s['name']} pool: {s['threads']} threads, {s['queued']} queued, {s['active']} active, "
+                f"{s['completed']} done, wait p50/p95 {s['wait_ms_p50']:.0f}/{s['wait_ms_p95']:.0f} ms, "
+                f"run p50/p95 {s['run_ms_p50']:.0f}/{s['run_ms_p95']:.0f} ms")
+
+def percentile_ms(values, fraction):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * fraction))] * 1000
+
+_network_pool = None
+_cpu_pool = None
+
+def get_network_pool():
+    """Tasks that mostly wait on sockets: preview fetches and image downloads."""
+    global _network_pool
+    if _network_pool is None:
+        _network_pool = InstrumentedPool("network", get_setting("network_pool_size"))
+    return _network_pool
+
+def print_pool_stats():
+    for pool in (_network_pool, _cpu_pool):
+        if pool is not None:
+            print(pool.describe())
+    # Imported here so the pools module itself does not pull in QtGui image code
+    from images import describe_image_stats
+    print(describe_image_stats())
+
+def get_cpu_pool():
+    """Tasks that keep a core busy: decoding, scaling and reading derivatives."""
+    global _cpu_pool
+    if _cpu_pool is None:
+        _cpu_pool = InstrumentedPool("cpu", get_setting("cpu_pool_size") or os.cpu_count() or 2)
+    return _cpu_pool
@@ -0,0 +1,117 @@
+import json, threading, time, sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import extract_link_preview, embedded_preview, preview_for_entry
+from preview_worker import load_thumbnail, load_favicon
+from repository import get_repository
+from storage import get_store
+from settings import get_setting
+
+CHECKPOINT_KEY = "prefetch_checkpoint"
+RETRY_KEY = "prefetch_retry"
+
+def prefetch_link(entry):
+    """Makes sure the link's preview, thumbnail and favicon are cached.
+
+    Anything already cached is a single lookup, so running this twice is cheap.
+    """
+    url = entry["url"]
+    preview = embedded_preview(entry)
+    if preview is None:
+        preview = extract_link_preview(url)
+        if preview.get("error"):
+            return False
+        get_repository().update_preview(entry["id"], preview_for_entry(entry, preview))
+
+    # Rendering one scale stores the derivatives for every scale
+    try:
+        load_thumbnail(url, preview, 1)
+    except Exception as e:
+        print("[Prefetch] Thumbnail failed:", e)
+    try:
+        load_favicon(url, preview, 1)
+    except Exception as e:
+        print("[Prefetch] Favicon failed:", e)
+    return True
+
+class PrefetchCrawler(threading.Thread):
+    """Warms the cache for links nobody has opened yet.
+
+    Walks the links in id order with a small worker budget, waits while the
+    user is interacting (see touch()), and stores the last finished id in
+    the link store so a restart continues where the previous run stopped.
+    Links that failed (offline, open circuit, dead host) are kept in a retry
+    list and attempted again on the next start; extract_link_preview answers
+    those still in backoff without touching the network.
+    """
+
+    def __init__(self, concurrency=None):
+        super().__init__(name="stashly-prefetch", daemon=True)
+        self.concurrency = concurrency or get_setting("prefetch_concurrency")
+        self.idle_seconds = get_setting("prefetch_idle_seconds")
+        self.last_activity = time.monotonic()
+        self.stopped = threading.Event()
+
+    def touch(self):
+        """Called for user input; the crawler holds off until the user has been idle."""
+        self.last_activity = time.monotonic()
+
+    def stop(self):
+        self.stopped.set()
+
+    def wait_until_idle(self):
+        while not self.stopped.is_set():
+            remaining = self.last_activity + self.idle_seconds - time.monotonic()
+            if remaining <= 0:
+                return True
+            self.stopped.wait(remaining)
+        return False
+
+    def run(self):
+        if self.stopped.wait(get_setting("prefetch_start_delay_seconds")):
+            return
+
+        store = get_store()
+        checkpoint = int(store.get_meta(CHECKPOINT_KEY, 0))
+        retry_ids = set(json.loads(store.get_meta(RETRY_KEY, "[]")))
+        pending = sorted(
+            (entry for entry in get_repository().all_links()
+             if entry["id"] > checkpoint or entry["id"] in retry_ids),
+            key=lambda entry: entry["id"]
+        )
+        # Forget retries for links deleted since
+        retry_ids &= {entry["id"] for entry in pending}
+        if not pending:
+            return
+        print(f"Prefetching {len(pending)} links")
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="stashly-prefetch") as executor:
+            # One batch per concurrency slot; the checkpoint moves past finished links,
+            # failed ones stay in the retry list
+            for start in range(0, len(pending), self.concurrency):
+                if not self.wait_until_idle():
+                    return
+                batch = pending[start:start + self.concurrency]
+                futures = [executor.submit(prefetch_link, entry) for entry in batch]
+                for entry, future in zip(batch, futures):
+                    try:
+                        succeeded = future.result()
+                    except Exception as e:
+                        print("[Prefetch] Link failed:", e)
+                        succeeded = False
+                    if succeeded:
+                        retry_ids.discard(entry["id"])
+                    else:
+                        retry_ids.add(entry["id"])
+                checkpoint = max(checkpoint, batch[-1]["id"])
+                try:
+                    store.set_meta(RETRY_KEY, json.dumps(sorted(retry_ids)))
+                    store.set_meta(CHECKPOINT_KEY, str(checkpoint))
+                except sqlite3.Error as e:
+                    # The store was closed under us during shutdown; the batch is redone next start
+                    print("[Prefetch] Could not save checkpoint:", e)
+                    return
+                if self.stopped.is_set():
+                    return
+
+        print("Prefetch finished")
@@ -1,79 +1,184 @@
 from PyQt6.QtCore import QObject, QRunnable, pyqtSignal, pyqtSlot
-from PyQt6.QtGui import QImage
-import os, requests, json
+from PyQt6.QtGui import QImage, QGuiApplication
+import threading, heapq, itertools
 
-from utils import extract_link_preview
+from utils import extract_link_preview, is_preview_stale, revalidate_link_preview, normalize_url
+from utils import load_cached_preview, lookup_favicon, store_favicon, favicon_entry, thumbnail_entry
+from cache import get_cache_store, url_key, favicon_key
+from fetcher import download_image
+from pools import get_network_pool, get_cpu_pool
+from images import derivative_scale, make_thumbnail, make_favicon, render_derivatives, load_derivative
+from images import decode_thumbnail_source, decode_favicon_source
 
 class ImageLoaderSignals(QObject):
     finished = pyqtSignal(QImage, QImage)  # thumbnail, favicon
+    completed = pyqtSignal(bool)           # after finished; True if downloads could fill in missing images
+
+# Favicon derivatives by (content hash, scale); many links share one origin icon
+_decoded_favicons = {}
+_decoded_favicons_lock = threading.Lock()
+
+def decode_favicon(content_hash, scale, data=None):
+    """Returns the ready-to-draw favicon, rendering and storing derivatives on first use."""
+    key = (content_hash, scale)
+    with _decoded_favicons_lock:
+        image = _decoded_favicons.get(key)
+    if image is not None:
+        return image
+
+    cache = get_cache_store()
+    stored = cache.get(favicon_key(content_hash), favicon_entry(scale))
+    image = load_derivative(stored, scale) if stored else None
+    if image is None:
+        if data is None:
+            data = cache.get(favicon_key(content_hash), "source")
+            if data is None:
+                return None
+        original = decode_favicon_source(data)
+        if original.isNull():
+            return None
+        derivatives = store_derivatives(original, make_favicon, favicon_key(content_hash), favicon_entry)
+        image = derivatives[scale]
+
+    with _decoded_favicons_lock:
+        _decoded_favicons[key] = image
+    return image
+
+def store_derivatives(image, make, key, entry_for_scale):
+    derivatives = render_derivatives(image, make)
+    cache = get_cache_store()
+    for scale, (derivative, png) in derivatives.items():
+        cache.put(key, entry_for_scale(scale), png)
+    return {scale: derivative for scale, (derivative, _) in derivatives.items()}
+
+def load_thumbnail(url, preview, scale, download=True):
+    cache = get_cache_store()
+    key = url_key(url)
+    stored = cache.get(key, thumbnail_entry(scale))
+    if stored:
+        image = load_derivative(stored, scale)
+        if image is not None:
+            return image
+
+    # Full-size originals are only touched once, to render the derivatives
+    data = cache.get(key, "thumbnail-source")
+    if data is None and download:
+        source = preview.get("thumbnail", "")
+        if source.startswith("http"):
+            data = download_image(source)
+    if not data:
+        return None
+
+    original = decode_thumbnail_source(data)
+    if original.isNull():
+        return None
+    derivatives = store_derivatives(original, make_thumbnail, key, thumbnail_entry)
+    cache.delete(key, "thumbnail-source")
+    return derivatives[scale]
+
+def load_favicon(url, preview, scale, download=True):
+    # Favicons come from the shared per-origin store
+    content_hash = lookup_favicon(url)
+    if content_hash:
+        image = decode_favicon(content_hash, scale)
+        if image is not None:
+            return image
+
+    # Move a favicon cached by older versions into the shared store
+    cache = get_cache_store()
+    key = url_key(url)
+    data = cache.get(key, "favicon-source")
+    if data is not None:
+        cache.delete(key, "favicon-source")
+    elif download:
+        # Download missing favicon (once per origin)
+        source = preview.get("favicon", "")
+        if source.startswith("http"):
+            data = download_image(source)
+    if not data:
+        return None
+
+    content_hash = store_favicon(url, data)
+    return decode_favicon(content_hash, scale, data=data)
+
+def missing_image_sources(url, preview):
+    """(kind, source url) for every image that needs a download before it can be rendered."""
+    cache = get_cache_store()
+    key = url_key(url)
+    missing = []
+    thumbnail = preview.get("thumbnail", "")
+    if thumbnail.startswith("http") and not (cache.has(key, thumbnail_entry(1)) or cache.has(key, "thumbnail-source")):
+        missing.append(("thumbnail", thumbnail))
+    favicon = preview.get("favicon", "")
+    if favicon.startswith("http") and not cache.has(key, "favicon-source"):
+        content_hash = lookup_favicon(url)
+        stored = content_hash is not None and (
+            cache.has(favicon_key(content_hash), favicon_entry(1)) or cache.has(favicon_key(content_hash), "source")
+        )
+        if not stored:
+            missing.append(("favicon", favicon))
+    return missing
+
+def download_image_sources(url, preview):
+    """Downloads missing image sources into the cache; decoding is left to the CPU pool."""
+    for kind, source in missing_image_sources(url, preview):
+        try:
+            data = download_image(source)
+        except Exception as e:
+            print(f"[ImageDownload] {kind.capitalize()} failed:", e)
+            continue
+        if not data:
+            continue
+        if kind == "thumbnail":
+            get_cache_store().put(url_key(url), "thumbnail-source", data)
+        else:
+            store_favicon(url, data)
 
 class ImageLoaderWorker(QRunnable):
-    def __init__(self, cache_folder):
+    """Produces display-ready thumbnail and favicon images off the GUI thread.
+
+    Downloads are turned into small derivatives (160x100 rounded thumbnail,
+    24x24 favicon, plus @2x variants) once and stored in the cache; later
+    loads read only the derivative for the screen's scale. Runs on the CPU
+    pool and never touches the network: images that still need a download
+    are reported through completed(True) and fetched by ImageDownloadWorker.
+    """
+
+    def __init__(self, url, device_pixel_ratio=1.0, preview=None):
         super().__init__()
-        self.cache_folder = cache_folder
+        self.url = url
+        self.scale = derivative_scale(device_pixel_ratio)
+        self.preview = preview  # the link's stored preview, if the caller has it
         self.signals = ImageLoaderSignals()
 
     def run(self):
+        missing = False
+        try:
+            missing = self.load()
+        except Exception as e:
+            print("[ImageWorker] Load failed:", e)
+        finally:
+            # Always reported, or the coordinator would keep this job running forever
+            self.signals.completed.emit(missing)
+
+    def load(self):
+        preview = self.preview or load_cached_preview(self.url) or {}
+
         thumb_img = None
         favicon_img = None
+        try:
+            thumb_img = load_thumbnail(self.url, preview, self.scale, download=False)
+        except Exception as e:
+            print("[ImageWorker] Thumbnail failed:", e)
+        try:
+            favicon_img = load_favicon(self.url, preview, self.scale, download=False)
+        except Exception as e:
+            print("[ImageWorker] Favicon failed:", e)
+
+        missing = False
+        if thumb_img is None or favicon_img is None:
+            missing = bool(missing_image_sources(self.url, preview))
 
-        thumb_path = os.path.join(self.cache_folder, "thumbnail.png")
-        favicon_path = os.path.join(self.cache_folder, "favicon.png")
-        meta_path = os.path.join(self.cache_folder, "preview.txt")
-
-        headers = {"User-Agent": "Mozilla/5.0"}
-
-        if os.path.exists(thumb_path):
-            try:
-                image = QImage(thumb_path)
-                if not image.isNull():
-                    thumb_img = image
-            except Exception as e:
-                print("Thumbnail load failed:", e)
-
-        if os.path.exists(favicon_path):
-            try:
-                image = QImage(favicon_path)
-                if not image.isNull():
-                    favicon_img = image
-            except Exception as e:
-                print("Favicon load failed:", e)
-        
-        # If either image is missing, try fetching using URLs in meta.txt
-        if (thumb_img is None or favicon_img is None) and os.path.exists(meta_path):
-            try:
-                with open(meta_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-
-                # Load missing thumbnail
-                if thumb_img is None:
-                    url = data.get("thumbnail", "")
-                    if url.startswith("http"):
-                        response = requests.get(url, headers=headers, timeout=5)
-                        if response.status_code == 200:
-                            with open(thumb_path, "wb") as f_out:
-                                f_out.write(response.content)
-                            image = QImage()
-                            image.loadFromData(response.content)
-                            if not image.isNull():
-                                thumb_img = image
-
-                # Load missing favicon
-                if favicon_img is None:
-                    url = data.get("favicon", "")
-                    if url.startswith("http"):
-                        response = requests.get(url, headers=headers, timeout=5)
-                        if response.status_code == 200:
-                            with open(favicon_path, "wb") as f_out:
-                                f_out.write(response.content)
-                            image = QImage()
-                            image.loadFromData(response.content)
-                            if not image.isNull():
-                                favicon_img = image
-
-            except Exception as e:
-                print("[ImageWorker] Error reading preview.txt or downloading images:", e)
-            
         # === Safety: Return empty QImages if needed ===
         if thumb_img is None:
             thumb_img = QImage()  # Empty image
@@ -81,18 +186,235 @@ class ImageLoaderWorker(QRunnable):
             favicon_img = QImage()
 
         self.signals.finished.emit(thumb_img, favicon_img)
+        return missing
+
+class ImageDownloadSignals(QObject):
+    completed = pyqtSignal()
+
+class ImageDownloadWorker(QRunnable):
+    """Network half of image loading: fetches missing sources into the cache."""
+
+    def __init__(self, url, preview=None):
+        super().__init__()
+        self.url = url
+        self.preview = preview
+        self.signals = ImageDownloadSignals()
+
+    def run(self):
+        try:
+            download_image_sources(self.url, self.preview or load_cached_preview(self.url) or {})
+        finally:
+            self.signals.completed.emit()
 
 class PreviewWorkerSignals(QObject):
     finished = pyqtSignal(dict)
+    completed = pyqtSignal()  # after the last finished emit (cached copy + optional refresh)
 
 class PreviewWorker(QRunnable):
-    def __init__(self, url):
+    """Fetches a link's preview, or only refreshes it when the caller already has one."""
+
+    def __init__(self, url, preview=None):
         super().__init__()
         self.url = url
+        self.preview = preview
         self.signals = PreviewWorkerSignals()
 
     @pyqtSlot()
     def run(self):
-        preview = extract_link_preview(self.url)
-        self.signals.finished.emit(preview)
+        try:
+            self.fetch()
+        except Exception as e:
+            print("[PreviewWorker] Fetch failed:", e)
+        finally:
+            # Always reported, or the coordinator would keep this job running forever
+            self.signals.completed.emit()
+
+    def fetch(self):
+        if self.preview is None:
+            preview = extract_link_preview(self.url)
+            self.signals.finished.emit(preview)
+        else:
+            # The caller's copy may carry a title the user typed; revalidate the
+            # shared per-URL cache entry instead so that title never gets cached
+            preview = load_cached_preview(self.url)
+            if preview is None or preview.get("error"):
+                preview = extract_link_preview(self.url)
+                self.signals.finished.emit(preview)
+            elif not is_preview_stale(preview):
+                # The cache is fresher than the stored copy; hand it back as is
+                self.signals.finished.emit(preview)
+
+        # Show the known copy first, then revalidate it if it is past its TTL
+        if not preview.get("error") and is_preview_stale(preview):
+            current = revalidate_link_preview(self.url, preview)
+            if current is not None:
+                self.signals.finished.emit(current)
+
+class FetchJob:
+    def __init__(self, kind, url, preview=None):
+        self.kind = kind
+        self.url = url
+        self.preview = preview  # stored preview handed in by the first requester
+        self.waiters = []    # [owner, callback, priority]
+        self.started = False
+        self.downloaded = False  # images: the download step already ran
+        self.last = None     # last result, handed to waiters that join late
+        self.priority = None # priority of this job's live queue entry
+
+    def top_priority(self):
+        return max((waiter[2] for waiter in self.waiters), default=None)
+
+class FetchCoordinator(QObject):
+    """Schedules preview/image fetches by priority and merges duplicates.
+
+    Lives on the GUI thread. Requests for a URL that is already queued or
+    running join that job and receive the same result. Queued jobs run
+    highest priority first (cards on screen before cards far below), never
+    more than the worker pools can run at once, so new high-priority work is
+    not stuck behind a backlog inside a thread pool. Cancelling an owner drops
+    its callbacks and any queued job nobody else is waiting for.
+
+    Preview fetches and image downloads run on the network pool; image
+    decoding runs on the CPU pool, so slow sites never hold up decodes.
+    """
+
+    def __init__(self, network_pool=None, cpu_pool=None, max_running=None):
+        super().__init__()
+        self.network_pool = network_pool or get_network_pool()
+        self.cpu_pool = cpu_pool or get_cpu_pool()
+        self.max_running = max_running or self.network_pool.maxThreadCount() + self.cpu_pool.maxThreadCount()
+        self.jobs = {}   # (kind, normalized url) -> FetchJob
+        self.owned = {}  # owner -> set of job keys
+        self.queue = []  # heap of (-priority, sequence, key); stale entries are skipped
+        self.sequence = itertools.count()
+        self.running = 0
+
+    def request_preview(self, url, callback, owner=None, priority=0, preview=None):
+        """With a known preview only a stale refresh runs; callbacks get each newer copy."""
+        self.request("preview", url, callback, owner, priority, preview)
+
+    def request_images(self, url, callback, owner=None, priority=0, preview=None):
+        self.request("images", url, callback, owner, priority, preview)
+
+    def request(self, kind, url, callback, owner, priority, preview=None):
+        # Called from Qt slots: an exception here would abort the application
+        try:
+            key = (kind, normalize_url(url))
+        except Exception as e:
+            print(f"Cannot schedule {kind} for {url!r}:", e)
+            key = (kind, url)
+        job = self.jobs.get(key)
+        if job is None:
+            job = self.jobs[key] = FetchJob(kind, url, preview)
+        job.waiters.append([owner, callback, priority])
+        if owner is not None:
+            self.owned.setdefault(owner, set()).add(key)
+
+        if job.started:
+            if job.last is not None:
+                self.deliver(callback, *job.last)
+        else:
+            self.enqueue(key, job)
+            self.dispatch()
+
+    def set_priority(self, owner, priority):
+        for key in self.owned.get(owner, ()):
+            job = self.jobs.get(key)
+            if job is None:
+                continue
+            for waiter in job.waiters:
+                if waiter[0] == owner:
+                    waiter[2] = priority
+            if not job.started:
+                self.enqueue(key, job)
+
+    def cancel(self, owner):
+        for key in self.owned.pop(owner, ()):
+            job = self.jobs.get(key)
+            if job is None:
+                continue
+            job.waiters = [waiter for waiter in job.waiters if waiter[0] != owner]
+            if job.started:
+                continue
+            if job.waiters:
+                self.enqueue(key, job)
+            else:
+                del self.jobs[key]
+
+    def enqueue(self, key, job):
+        priority = job.top_priority()
+        if priority is not None and priority != job.priority:
+            job.priority = priority
+            heapq.heappush(self.queue, (-priority, next(self.sequence), key))
+
+    def dispatch(self):
+        while self.running < self.max_running and self.queue:
+            negative_priority, _, key = heapq.heappop(self.queue)
+            job = self.jobs.get(key)
+            if job is None or job.started or job.priority != -negative_priority:
+                continue
+            self.start(key, job)
+
+    def start(self, key, job):
+        job.started = True
+        self.running += 1
+        if job.kind == "preview":
+            worker = PreviewWorker(job.url, job.preview)
+            worker.signals.finished.connect(lambda preview, key=key: self.job_result(key, preview))
+            worker.signals.completed.connect(lambda key=key: self.job_done(key))
+            self.network_pool.start(worker)
+        else:
+            self.start_image_load(key, job)
+
+    def start_image_load(self, key, job):
+        worker = ImageLoaderWorker(job.url, QGuiApplication.primaryScreen().devicePixelRatio(), job.preview)
+        worker.signals.finished.connect(lambda thumb, favicon, key=key: self.job_result(key, thumb, favicon))
+        worker.signals.completed.connect(lambda missing, key=key: self.image_load_done(key, missing))
+        self.cpu_pool.start(worker)
+
+    def image_load_done(self, key, missing):
+        job = self.jobs.get(key)
+        if job is None or not missing or job.downloaded or not job.waiters:
+            self.job_done(key)
+            return
+
+        # Download on the network pool, then render again on the CPU pool
+        job.downloaded = True
+        worker = ImageDownloadWorker(job.url, job.preview)
+        worker.signals.completed.connect(lambda key=key, job=job: self.start_image_load(key, job))
+        self.network_pool.start(worker)
+
+    def job_result(self, key, *result):
+        job = self.jobs.get(key)
+        if job is None:
+            return
+        job.last = result
+        for owner, callback, _ in list(job.waiters):
+            self.deliver(callback, *result)
+
+    def job_done(self, key):
+        self.running -= 1
+        job = self.jobs.pop(key, None)
+        if job is not None:
+            for owner, _, _ in job.waiters:
+                if owner is not None and owner in self.owned:
+                    self.owned[owner].discard(key)
+                    if not self.owned[owner]:
+                        del self.owned[owner]
+        self.dispatch()
+
+    def deliver(self, callback, *args):
+        try:
+            callback(*args)
+        except RuntimeError as e:
+            # The waiting widget was destroyed before it could be cancelled
+            print("Skipped preview delivery:", e)
+
+_coordinator = None
+
+def get_fetch_coordinator():
+    global _coordinator
+    if _coordinator is None:
+        _coordinator = FetchCoordinator()
+    return _coordinator
 
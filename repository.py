@@ -0,0 +1,204 @@
+import threading
+from bisect import insort
+
+from storage import get_store, normalize_tags
+
+class LinkRepository:
+    """Process-wide in-memory view of the link store.
+
+    The store is read once; categories and tags are kept as indexes so that
+    windows can be opened with dictionary lookups. Writes go through the
+    repository, which updates the store row and the indexes together. Changes
+    made by other processes are picked up through the store's data version.
+
+    Listeners registered with subscribe() are called as listener(event, args)
+    after each change, on the thread that made it: ("added", (entry,)),
+    ("updated", (entry,)), ("deleted", (entry,)), ("categories_changed", ())
+    and ("reloaded", ()).
+    """
+
+    def __init__(self, store=None):
+        self.store = store or get_store()
+        self.lock = threading.RLock()
+        self.version = None
+        self.listeners = []
+        self.reload()
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def _notify(self, event, *args):
+        for listener in list(self.listeners):
+            try:
+                listener(event, args)
+            except Exception as e:
+                print(f"Repository listener failed on {event}:", e)
+
+    # === Loading ===
+
+    def reload(self):
+        with self.lock:
+            self.version = self.store.data_version()
+            self.links = {}
+            self.by_category = {}
+            self.tag_counts = {}
+            self._sorted_categories = None
+            self._sorted_tags = None
+            for entry in self.store.list_links():
+                self._index(entry)
+
+    def refresh_if_changed(self):
+        with self.lock:
+            changed = self.store.data_version() != self.version
+            if changed:
+                self.reload()
+        if changed:
+            self._notify("reloaded")
+
+    def _index(self, entry):
+        self.links[entry["id"]] = entry
+        category = entry.get("category", "")
+        if category:
+            if category not in self.by_category:
+                self._sorted_categories = None
+            insort(self.by_category.setdefault(category, []), entry["id"])
+        for tag in entry.get("tags", []):
+            if tag not in self.tag_counts:
+                self._sorted_tags = None
+            self.tag_counts[tag] = self.tag_counts.get(tag, 0) + 1
+
+    def _unindex(self, entry):
+        self.links.pop(entry["id"], None)
+        category = entry.get("category", "")
+        ids = self.by_category.get(category)
+        if ids is not None:
+            ids.remove(entry["id"])
+            if not ids:
+                del self.by_category[category]
+                self._sorted_categories = None
+        for tag in entry.get("tags", []):
+            self.tag_counts[tag] -= 1
+            if self.tag_counts[tag] <= 0:
+                del self.tag_counts[tag]
+                self._sorted_tags = None
+
+    # === Queries ===
+
+    def categories(self):
+        self.refresh_if_changed()
+        with self.lock:
+            if self._sorted_categories is None:
+                self._sorted_categories = sorted(self.by_category)
+            return list(self._sorted_categories)
+
+    def tags(self):
+        self.refresh_if_changed()
+        with self.lock:
+            if self._sorted_tags is None:
+                self._sorted_tags = sorted(self.tag_counts)
+            return list(self._sorted_tags)
+
+    def links_in_category(self, category):
+        self.refresh_if_changed()
+        with self.lock:
+            return [self.links[link_id] for link_id in self.by_category.get(category, [])]
+
+    def category_counts(self):
+        self.refresh_if_changed()
+        with self.lock:
+            return {category: len(ids) for category, ids in self.by_category.items()}
+
+    def link_ids_in_category(self, category):
+        """Just the ids (one list copy), for callers that resolve entries in batches."""
+        self.refresh_if_changed()
+        with self.lock:
+            return list(self.by_category.get(category, []))
+
+    def get_links(self, link_ids):
+        """Entries for link_ids in order; None for ids that no longer exist."""
+        with self.lock:
+            return [self.links.get(link_id) for link_id in link_ids]
+
+    def all_links(self):
+        self.refresh_if_changed()
+        with self.lock:
+            return list(self.links.values())
+
+    def get_link(self, link_id):
+        self.refresh_if_changed()
+        with self.lock:
+            return self.links.get(link_id)
+
+    def search(self, query, limit=50):
+        """Ranked full-text search over titles, descriptions, tags and URLs."""
+        self.refresh_if_changed()
+        with self.lock:
+            ids = self.store.search(query, limit)
+            return [self.links[link_id] for link_id in ids if link_id in self.links]
+
+    # === Mutations ===
+
+    def add_link(self, entry):
+        with self.lock:
+            link_id = self.store.add_link(entry)
+            entry = self.store.get_link(link_id)
+            self._index(entry)
+        self._notify("added", entry)
+        return link_id
+
+    def update_tags(self, link_id, tags):
+        with self.lock:
+            entry = self.links.get(link_id)
+            self.store.update_tags(link_id, tags)
+            if entry is not None:
+                self._unindex(entry)
+                entry = dict(entry, tags=normalize_tags(tags))
+                self._index(entry)
+        if entry is not None:
+            self._notify("updated", entry)
+
+    def update_preview(self, link_id, preview):
+        with self.lock:
+            self.store.update_preview(link_id, preview)
+            entry = self.links.get(link_id)
+            if entry is not None:
+                entry = self.links[link_id] = dict(entry, preview=preview)
+        if entry is not None:
+            self._notify("updated", entry)
+
+    def delete_link(self, link_id):
+        with self.lock:
+            self.store.delete_link(link_id)
+            entry = self.links.get(link_id)
+            if entry is not None:
+                self._unindex(entry)
+        if entry is not None:
+            self._notify("deleted", entry)
+
+    def rename_category(self, old_name, new_name):
+        with self.lock:
+            count = self.store.rename_category(old_name, new_name)
+            for link_id in list(self.by_category.get(old_name, [])):
+                entry = self.links[link_id]
+                self._unindex(entry)
+                self._index(dict(entry, category=new_name.strip()))
+        self._notify("categories_changed")
+        return count
+
+    def delete_category(self, category):
+        with self.lock:
+            urls = self.store.delete_category(category)
+            for link_id in list(self.by_category.get(category, [])):
+                self._unindex(self.links[link_id])
+        self._notify("categories_changed")
+        return urls
+
+_repository = None
+_repository_lock = threading.Lock()
+
+def get_repository():
+    global _repository
+    with _repository_lock:
+        if _repository is None:
+            _repository = LinkRepository()
+        return _repository
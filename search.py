@@ -0,0 +1,114 @@
+import re, sqlite3
+
+# Two FTS5 indexes over the same text: a word index with prefix tables for
+# ranked "word*" matches, and a trigram index for partial words ("hub" -> github).
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS links_fts USING fts5(
+    title, description, tags, url, prefix='2 3'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS links_trigram USING fts5(
+    title, description, tags, url, tokenize='trigram'
+);
+"""
+
+# bm25 column weights: title, description, tags, url
+RANK_WEIGHTS = "10.0, 2.0, 6.0, 3.0"
+
+def create_search_tables(conn):
+    """Returns False when this SQLite build has no FTS5 (search then uses LIKE)."""
+    try:
+        conn.executescript(SEARCH_SCHEMA)
+        return True
+    except sqlite3.OperationalError as e:
+        print("Full-text search unavailable, falling back to LIKE:", e)
+        return False
+
+def search_document(entry):
+    preview = entry.get("preview") or {}
+    return (
+        entry.get("title") or preview.get("title", ""),
+        preview.get("description", ""),
+        " ".join(entry.get("tags") or []),
+        entry.get("url", "")
+    )
+
+def index_link(conn, link_id, entry):
+    unindex_links(conn, [link_id])
+    document = search_document(entry)
+    for table in ("links_fts", "links_trigram"):
+        conn.execute(
+            f"INSERT INTO {table} (rowid, title, description, tags, url) VALUES (?, ?, ?, ?, ?)",
+            (link_id, *document)
+        )
+
+def unindex_links(conn, link_ids):
+    rows = [(link_id,) for link_id in link_ids]
+    for table in ("links_fts", "links_trigram"):
+        conn.executemany(f"DELETE FROM {table} WHERE rowid = ?", rows)
+
+def query_terms(query):
+    return re.findall(r"\w+", query.lower())
+
+def search_link_ids(conn, query, limit=50, fts=True):
+    """Returns link ids ordered best match first."""
+    terms = query_terms(query)
+    if not terms:
+        return []
+
+    if not fts:
+        return like_search(conn, terms, limit)
+
+    # Whole words and prefixes, ranked by bm25
+    match = " ".join(f'"{term}"*' for term in terms)
+    ids = ranked_matches(conn, "links_fts", match, limit)
+
+    # Top up with substring matches from the trigram index
+    long_terms = [term for term in terms if len(term) >= 3]
+    if len(ids) < limit and len(long_terms) == len(terms):
+        seen = set(ids)
+        match = " ".join(f'"{term}"' for term in long_terms)
+        for link_id in ranked_matches(conn, "links_trigram", match, limit):
+            if link_id not in seen:
+                ids.append(link_id)
+                if len(ids) >= limit:
+                    break
+    return ids
+
+# Ranking every match of a common term costs ~100 ms over 100k links, so
+# matches in the heavily weighted columns are ranked in full first, and the
+# rest is filled from only this many candidates (newest first).
+RANK_CANDIDATES = 2000
+STRONG_COLUMNS = "{title tags}"
+
+def ranked_matches(conn, table, match, limit):
+    # A title or tag hit is never dropped by the candidate cap
+    ids = [row[0] for row in conn.execute(
+        f"SELECT rowid FROM {table} WHERE {table} MATCH ? "
+        f"ORDER BY bm25({table}, {RANK_WEIGHTS}) LIMIT ?",
+        (f"{STRONG_COLUMNS}: ({match})", limit)
+    )]
+    if len(ids) >= limit:
+        return ids
+
+    rows = conn.execute(
+        f"SELECT rowid, bm25({table}, {RANK_WEIGHTS}) FROM {table} WHERE {table} MATCH ? "
+        f"ORDER BY rowid DESC LIMIT ?", (match, RANK_CANDIDATES)
+    ).fetchall()
+    rows.sort(key=lambda row: row[1])
+    seen = set(ids)
+    for link_id, _ in rows:
+        if link_id not in seen:
+            ids.append(link_id)
+            if len(ids) >= limit:
+                break
+    return ids
+
+def like_search(conn, terms, limit):
+    clauses = []
+    params = []
+    for term in terms:
+        clauses.append("(links.title LIKE ? OR links.url LIKE ? OR links.preview LIKE ? "
+                       "OR EXISTS (SELECT 1 FROM tags WHERE tags.link_id = links.id AND tags.tag LIKE ?))")
+        params.extend([f"%{term}%"] * 4)
+    sql = f"SELECT id FROM links WHERE {' AND '.join(clauses)} ORDER BY id DESC LIMIT ?"
+    return [row[0] for row in conn.execute(sql, (*params, limit))]
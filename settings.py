@@ -0,0 +1,56 @@
+import json, os
+
+from paths import get_settings_file
+
+# Every tunable lives here; users override any of them in ~/.stashly/settings.json
+DEFAULT_SETTINGS = {
+    # Network fetch engine
+    "fetch_max_connections": 16,
+    "fetch_max_per_host": 4,
+    # Preview extraction stops at </head> or after this many bytes
+    "preview_max_head_bytes": 512 * 1024,
+    # Cached previews older than this are revalidated in the background
+    "preview_ttl_seconds": 7 * 24 * 3600,
+    # Failed previews are retried after base * 2^(attempts - 1), capped at max
+    "failure_backoff_base_seconds": 60,
+    "failure_backoff_max_seconds": 24 * 3600,
+    # A host is skipped for the cooldown after this many consecutive failures
+    "circuit_failure_threshold": 3,
+    "circuit_cooldown_seconds": 60,
+    # Remote images larger than this are not downloaded
+    "image_max_bytes": 5 * 1024 * 1024,
+    # Qt refuses to decode any image needing more memory than this
+    "image_decode_limit_mb": 64,
+    # Cache pack disk budget, enforced least recently used first
+    "cache_max_bytes": 512 * 1024 * 1024,
+    "cache_gc_interval_seconds": 600,
+    "cache_gc_initial_delay_seconds": 30,
+    # Background warm-up of links that have never been opened
+    "prefetch_concurrency": 2,
+    "prefetch_idle_seconds": 3,
+    "prefetch_start_delay_seconds": 5,
+    # Worker threads: network waits on sockets, cpu decodes and scales images (0 = core count)
+    "network_pool_size": 16,
+    "cpu_pool_size": 0,
+    # Main window should paint this soon after launch (checked by startup_report.py)
+    "startup_target_ms": 400,
+}
+
+_settings = None
+
+def load_settings():
+    global _settings
+    if _settings is None:
+        settings = dict(DEFAULT_SETTINGS)
+        path = get_settings_file()
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    settings.update(json.load(f))
+            except Exception as e:
+                print("Failed to load settings.json, using defaults:", e)
+        _settings = settings
+    return _settings
+
+def get_setting(key):
+    return load_settings().get(key, DEFAULT_SETTINGS.get(key))
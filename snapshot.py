@@ -0,0 +1,40 @@
+import json, os
+
+from paths import get_snapshot_file, atomic_write_json
+
+# Bump when the file layout changes; older snapshots are ignored
+SNAPSHOT_VERSION = 1
+
+_saved = None
+
+def load_snapshot():
+    """[(category, link count), ...] as of the last run, or None."""
+    global _saved
+    path = get_snapshot_file()
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception as e:
+        print("Ignoring unreadable startup snapshot:", e)
+        return None
+    if data.get("version") != SNAPSHOT_VERSION:
+        return None
+    _saved = [(item["name"], item["count"]) for item in data.get("categories", [])]
+    return list(_saved)
+
+def save_snapshot(categories):
+    """Stores [(category, link count), ...]; skipped when nothing changed."""
+    global _saved
+    categories = list(categories)
+    if categories == _saved:
+        return
+    try:
+        atomic_write_json(get_snapshot_file(), {
+            "version": SNAPSHOT_VERSION,
+            "categories": [{"name": name, "count": count} for name, count in categories]
+        })
+        _saved = categories
+    except Exception as e:
+        print("Failed to save startup snapshot:", e)
@@ -0,0 +1,74 @@
+"""Measures cold startup: first paint of the main window and where import time goes.
+
+    python startup_report.py [--top N]
+
+Runs main.py under `python -X importtime` with --startup-report (the window
+quits right after its first paint), then prints the slowest imports by
+cumulative time and the first-paint time against the startup_target_ms
+setting. Exits with status 1 when the target is missed.
+"""
+import argparse, os, re, subprocess, sys
+
+from settings import get_setting
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+STARTUP_LINE = re.compile(r"Startup: first paint after (\d+) ms")
+
+def run_startup():
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")  # works without a display
+    main_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", main_path, "--startup-report"],
+        capture_output=True, text=True, env=env, cwd=os.path.dirname(main_path)
+    )
+
+def parse_imports(stderr):
+    """[(cumulative us, self us, module, depth)] for every import the run made."""
+    imports = []
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            imports.append((int(cumulative_us), int(self_us), module, len(indent) // 2))
+    return imports
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stashly startup-time report")
+    parser.add_argument("--top", type=int, default=15, help="number of imports to list (default: 15)")
+    args = parser.parse_args(argv)
+
+    result = run_startup()
+    imports = parse_imports(result.stderr)
+    if not imports:
+        print(result.stderr or result.stdout)
+        print("No import timings captured; did main.py start?")
+        return 2
+
+    top_level = [item for item in imports if item[3] == 0]
+    total_ms = sum(cumulative for cumulative, *_ in top_level) / 1000
+    print(f"Imports: {len(imports)} modules, {total_ms:.0f} ms total\n")
+    print(f"{'cumulative':>11} {'self':>9}  module")
+    for cumulative_us, self_us, module, depth in sorted(imports, reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>9.1f}ms {self_us / 1000:>7.1f}ms  {module}")
+
+    # Modules main.py is meant to import lazily
+    deferred = ["requests", "bs4", "utils", "fetcher", "preview_worker", "linkcard", "widgets", "images"]
+    loaded = {module for *_, module, _ in imports}
+    eager = [module for module in deferred if module in loaded]
+    if eager:
+        print(f"\nImported before first paint but meant to be lazy: {', '.join(eager)}")
+
+    match = STARTUP_LINE.search(result.stdout)
+    target_ms = get_setting("startup_target_ms")
+    if not match:
+        print("\nFirst paint was not reported.")
+        print(result.stdout)
+        return 2
+    elapsed_ms = int(match.group(1))
+    verdict = "OK" if elapsed_ms <= target_ms else "OVER TARGET"
+    print(f"\nFirst paint: {elapsed_ms} ms (target {target_ms} ms) {verdict}")
+    return 0 if elapsed_ms <= target_ms else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+"""Headless maintenance commands; no Qt widgets are imported.
+
+    python -m stashly refresh [--all] [--jobs N]
+    python -m stashly prefetch [--force] [--jobs N]
+    python -m stashly gc [--max-bytes N]
+    python -m stashly stats
+
+Network I/O runs on a thread pool (--jobs); HTML parsing and image
+resizing run on a process pool (--procs, default: CPU count).
+Links still in failure backoff are skipped unless --all/--force is given.
+"""
+import argparse, multiprocessing, os, sys, threading, time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+
+from cache import get_cache_store, url_key, favicon_key
+from fetcher import CircuitOpenError, get_fetch_engine, download_image
+from repository import get_repository
+from storage import get_store
+from utils import (
+    read_head_bytes, response_encoding, parse_head_bytes, build_preview, validator_headers,
+    embedded_preview, preview_for_entry, is_preview_stale, drop_changed_images,
+    load_cached_preview, save_cached_preview, load_failure_record, record_preview_failure,
+    clear_failure_record, lookup_favicon, store_favicon, thumbnail_entry, favicon_entry
+)
+
+# === Process pool tasks (module level so they can be pickled) ===
+
+def parse_preview(url, data, encoding, etag, last_modified):
+    return build_preview(url, parse_head_bytes(data, encoding), etag, last_modified)
+
+def render_image(kind, data):
+    """Returns {scale: png bytes} for a downloaded thumbnail or favicon, or None."""
+    # Imported here so commands that never render images do not load Qt
+    from images import decode_thumbnail_source, decode_favicon_source, make_thumbnail, make_favicon, render_derivatives
+    if kind == "thumbnail":
+        image, make = decode_thumbnail_source(data), make_thumbnail
+    else:
+        image, make = decode_favicon_source(data), make_favicon
+    if image.isNull():
+        return None
+    return {scale: png for scale, (_, png) in render_derivatives(image, make).items()}
+
+# === Progress ===
+
+class Progress:
+    """Single-line progress on stderr, plus a summary of outcomes at the end."""
+
+    def __init__(self, label, total):
+        self.label = label
+        self.total = total
+        self.done = 0
+        self.outcomes = {}
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.last_print = 0
+
+    def step(self, outcome):
+        with self.lock:
+            self.done += 1
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+            now = time.monotonic()
+            if now - self.last_print >= 0.2 or self.done == self.total:
+                self.last_print = now
+                sys.stderr.write(f"\r{self.label}: {self.done}/{self.total} {self.summary()}")
+                sys.stderr.flush()
+
+    def summary(self):
+        return ", ".join(f"{count} {outcome}" for outcome, count in sorted(self.outcomes.items()))
+
+    def finish(self):
+        elapsed = time.monotonic() - self.started
+        sys.stderr.write("\n")
+        print(f"{self.label}: {self.done} links in {elapsed:.1f}s ({self.summary() or 'nothing to do'})")
+
+# === Commands ===
+
+def process_context():
+    # forkserver is POSIX only; elsewhere the platform default is already spawn
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context()
+
+def in_backoff(url):
+    """True while a failed link waits out its retry delay (see record_preview_failure)."""
+    failure = load_failure_record(url)
+    return bool(failure) and time.time() < failure.get("next_retry_at", 0)
+
+class BatchRunner:
+    """Runs one job per link: network on the thread pool, CPU work on the process pool."""
+
+    def __init__(self, jobs, procs):
+        self.threads = ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="stashly-net")
+        # Workers are first started from a network thread; forking a threaded
+        # process can deadlock, so they come from a clean forkserver instead
+        self.processes = ProcessPoolExecutor(max_workers=procs, mp_context=process_context())
+        self.repository = get_repository()
+        self.cache = get_cache_store()
+
+    def close(self):
+        self.threads.shutdown()
+        self.processes.shutdown()
+
+    def run(self, label, job, entries):
+        progress = Progress(label, len(entries))
+        futures = [self.threads.submit(job, entry) for entry in entries]
+        for future in as_completed(futures):
+            try:
+                outcome = future.result()
+            except Exception as e:
+                print(f"\n{label} failed:", e, file=sys.stderr)
+                outcome = "failed"
+            progress.step(outcome)
+        progress.finish()
+
+    def fetch_preview(self, entry, known=None):
+        """Fetches (or revalidates against known) and stores the link's preview."""
+        url = entry["url"]
+        try:
+            head = None
+            with get_fetch_engine().open(url, timeout=8, headers=validator_headers(known)) as response:
+                if response.status_code == 304 and known:
+                    preview = dict(known, fetched_at=time.time())
+                else:
+                    response.raise_for_status()
+                    head = (read_head_bytes(response), response_encoding(response),
+                            response.headers.get("ETag", ""), response.headers.get("Last-Modified", ""))
+            # The connection is released before parsing, which happens in another process
+            if head is not None:
+                preview = self.processes.submit(parse_preview, url, *head).result()
+        except CircuitOpenError:
+            # The host is down; this is not an attempt against the link itself
+            raise
+        except Exception as e:
+            record_preview_failure(url, e, load_failure_record(url))
+            return None
+
+        if known:
+            drop_changed_images(url, known, preview)
+        clear_failure_record(url)
+        save_cached_preview(url, preview)
+        self.repository.update_preview(entry["id"], preview_for_entry(entry, preview))
+        return preview
+
+    def refresh_link(self, entry, force=False):
+        known = embedded_preview(entry) or load_cached_preview(entry["url"])
+        if known is not None and known.get("error"):
+            known = None
+        if known is not None and not force and not is_preview_stale(known):
+            return "fresh"
+        if not force and in_backoff(entry["url"]):
+            return "backoff"
+        try:
+            return "refreshed" if self.fetch_preview(entry, known) else "failed"
+        except CircuitOpenError:
+            return "circuit open"
+
+    def prefetch_link(self, entry, force=False):
+        url = entry["url"]
+        preview = embedded_preview(entry)
+        fetched = False
+        if preview is None:
+            cached = load_cached_preview(url)
+            preview = cached if cached and not cached.get("error") else None
+        if preview is None:
+            if not force and in_backoff(url):
+                return "backoff"
+            try:
+                preview = self.fetch_preview(entry)
+            except CircuitOpenError:
+                return "circuit open"
+            if preview is None:
+                return "failed"
+            fetched = True
+
+        rendered = self.prefetch_thumbnail(url, preview)
+        rendered = self.prefetch_favicon(url, preview) or rendered
+        return "fetched" if fetched or rendered else "cached"
+
+    def prefetch_thumbnail(self, url, preview):
+        key = url_key(url)
+        source = preview.get("thumbnail", "")
+        if self.cache.has(key, thumbnail_entry(1)) or not source.startswith("http"):
+            return False
+        data = download_image(source)
+        pngs = self.processes.submit(render_image, "thumbnail", data).result() if data else None
+        if not pngs:
+            return False
+        for scale, png in pngs.items():
+            self.cache.put(key, thumbnail_entry(scale), png)
+        return True
+
+    def prefetch_favicon(self, url, preview):
+        content_hash = lookup_favicon(url)
+        if content_hash and self.cache.has(favicon_key(content_hash), favicon_entry(1)):
+            return False
+        if content_hash:
+            data = self.cache.get(favicon_key(content_hash), "source")
+        else:
+            source = preview.get("favicon", "")
+            data = download_image(source) if source.startswith("http") else None
+        if not data:
+            return False
+        content_hash = store_favicon(url, data)
+        pngs = self.processes.submit(render_image, "favicon", data).result()
+        if not pngs:
+            return False
+        for scale, png in pngs.items():
+            self.cache.put(favicon_key(content_hash), favicon_entry(scale), png)
+        return True
+
+def command_refresh(args):
+    runner = BatchRunner(args.jobs, args.procs)
+    try:
+        runner.run("refresh", lambda entry: runner.refresh_link(entry, args.all), get_repository().all_links())
+    finally:
+        runner.close()
+
+def command_prefetch(args):
+    runner = BatchRunner(args.jobs, args.procs)
+    try:
+        runner.run("prefetch", lambda entry: runner.prefetch_link(entry, args.force), get_repository().all_links())
+    finally:
+        runner.close()
+
+def command_gc(args):
+    cache = get_cache_store()
+    before = cache.total_size()
+    orphans = cache.collect_orphans(entry["url"] for entry in get_repository().all_links())
+    evicted = cache.enforce_budget(args.max_bytes)
+    after = cache.total_size()
+    print(f"gc: removed {orphans} orphaned and {evicted} least recently used keys, "
+          f"{format_bytes(before)} -> {format_bytes(after)}")
+
+def command_stats(args):
+    repository = get_repository()
+    links = repository.all_links()
+    missing = sum(1 for entry in links if embedded_preview(entry) is None)
+    stale = sum(1 for entry in links if embedded_preview(entry) and is_preview_stale(entry["preview"]))
+    cache = get_cache_store().stats()
+    print(f"links:           {len(links)}")
+    print(f"categories:      {len(repository.categories())}")
+    print(f"tags:            {len(repository.tags())}")
+    print(f"no preview:      {missing}")
+    print(f"stale previews:  {stale}")
+    print(f"cache size:      {format_bytes(cache['bytes'])} in {cache['entries']} entries ({cache['keys']} keys)")
+    print(f"favicon origins: {cache['favicon_origins']}")
+    print(f"failed fetches:  {cache['failures']}")
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
+        size /= 1024
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="stashly", description="Stashly maintenance without the GUI")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    refresh = commands.add_parser("refresh", help="revalidate stale link previews")
+    refresh.add_argument("--all", action="store_true",
+                         help="revalidate every preview, including fresh ones and links in backoff")
+    prefetch = commands.add_parser("prefetch", help="fetch missing previews, thumbnails and favicons")
+    prefetch.add_argument("--force", action="store_true", help="also retry links still in failure backoff")
+    for command in (refresh, prefetch):
+        command.add_argument("--jobs", type=int, default=8, help="concurrent network fetches (default: 8)")
+        command.add_argument("--procs", type=int, default=os.cpu_count() or 1,
+                             help="processes for parsing and image resizing (default: CPU count)")
+
+    gc = commands.add_parser("gc", help="drop orphaned cache entries and enforce the cache budget")
+    gc.add_argument("--max-bytes", type=int, default=None, help="cache budget (default: cache_max_bytes setting)")
+    commands.add_parser("stats", help="show link and cache statistics")
+
+    args = parser.parse_args(argv)
+    try:
+        {"refresh": command_refresh, "prefetch": command_prefetch,
+         "gc": command_gc, "stats": command_stats}[args.command](args)
+    finally:
+        get_store().close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+import os, json, sqlite3, threading
+
+from paths import get_db_file_path, get_data_file_path
+from search import create_search_tables, index_link, unindex_links, search_link_ids
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS links (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    title TEXT NOT NULL DEFAULT '',
+    category TEXT NOT NULL DEFAULT '',
+    preview TEXT NOT NULL DEFAULT '{}'
+);
+CREATE TABLE IF NOT EXISTS tags (
+    link_id INTEGER NOT NULL REFERENCES links(id) ON DELETE CASCADE,
+    tag TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_links_url ON links(url);
+CREATE INDEX IF NOT EXISTS idx_links_category ON links(category);
+CREATE INDEX IF NOT EXISTS idx_tags_tag ON tags(tag);
+CREATE INDEX IF NOT EXISTS idx_tags_link ON tags(link_id);
+"""
+
+# Writes are appended to the WAL and never pay for a checkpoint themselves;
+# the background checkpointer folds the WAL back into the main database.
+CHECKPOINT_INTERVAL = 30  # seconds
+WAL_SIZE_LIMIT = 4 * 1024 * 1024
+
+def normalize_tags(tags):
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    return [tag.strip() for tag in tags or [] if tag and tag.strip()]
+
+class LinkStore:
+    """SQLite backed link storage with single-row updates."""
+
+    def __init__(self, db_path=None, background_checkpoint=True):
+        self.db_path = db_path or get_db_file_path()
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute("PRAGMA wal_autocheckpoint = 0")
+        self.conn.execute(f"PRAGMA journal_size_limit = {WAL_SIZE_LIMIT}")
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(SCHEMA)
+        self.fts = create_search_tables(self.conn)
+        self.migrate_from_json()
+        if self.fts and not self.get_meta("search_indexed"):
+            self.rebuild_search_index()
+
+        self.checkpointer = None
+        if background_checkpoint:
+            self.checkpointer = WalCheckpointer(self.db_path)
+            self.checkpointer.start()
+
+    def close(self):
+        """Stops the checkpointer and folds the remaining WAL into the database."""
+        if self.checkpointer is not None:
+            self.checkpointer.stop()
+            self.checkpointer = None
+        with self.lock:
+            try:
+                self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            except sqlite3.Error as e:
+                print("Final WAL checkpoint failed:", e)
+            self.conn.close()
+
+    # === Migration ===
+
+    def migrate_from_json(self, json_path=None):
+        """Imports the legacy data.json once; later starts only check the meta flag."""
+        with self.lock:
+            if self.get_meta("migrated_from_json"):
+                return 0
+
+            json_path = json_path or get_data_file_path()
+            data = []
+            if os.path.exists(json_path):
+                try:
+                    with open(json_path, 'r') as f:
+                        data = json.load(f)
+                except Exception as e:
+                    print("Failed to read data.json for migration:", e)
+                    return 0
+
+            with self.conn:
+                for entry in data:
+                    self._insert(entry)
+                self._set_meta("migrated_from_json", json_path)
+
+            if data:
+                print(f"Migrated {len(data)} links from {json_path}")
+            return len(data)
+
+    def rebuild_search_index(self):
+        """Indexes every link; only needed for databases created before search existed."""
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM links_fts")
+            self.conn.execute("DELETE FROM links_trigram")
+            for entry in self.list_links():
+                index_link(self.conn, entry["id"], entry)
+            self._set_meta("search_indexed", "1")
+
+    def get_meta(self, key, default=None):
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else default
+
+    def set_meta(self, key, value):
+        with self.lock, self.conn:
+            self._set_meta(key, value)
+
+    def _set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    # === Queries ===
+
+    def data_version(self):
+        """Changes whenever another connection (e.g. another process) commits."""
+        with self.lock:
+            return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def list_categories(self):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT DISTINCT category FROM links WHERE category != '' ORDER BY category"
+            ).fetchall()
+        return [row["category"] for row in rows]
+
+    def list_tags(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT DISTINCT tag FROM tags ORDER BY tag").fetchall()
+        return [row["tag"] for row in rows]
+
+    def list_links(self, category=None):
+        with self.lock:
+            if category is None:
+                rows = self.conn.execute("SELECT * FROM links ORDER BY id").fetchall()
+                tag_rows = self.conn.execute("SELECT link_id, tag FROM tags ORDER BY rowid").fetchall()
+            else:
+                rows = self.conn.execute(
+                    "SELECT * FROM links WHERE category = ? ORDER BY id", (category,)
+                ).fetchall()
+                tag_rows = self.conn.execute(
+                    "SELECT tags.link_id, tags.tag FROM tags JOIN links ON links.id = tags.link_id "
+                    "WHERE links.category = ? ORDER BY tags.rowid", (category,)
+                ).fetchall()
+
+        tags_by_link = {}
+        for row in tag_rows:
+            tags_by_link.setdefault(row["link_id"], []).append(row["tag"])
+
+        return [self._row_to_entry(row, tags_by_link.get(row["id"], [])) for row in rows]
+
+    def get_link(self, link_id):
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM links WHERE id = ?", (link_id,)).fetchone()
+            if row is None:
+                return None
+            tags = [r["tag"] for r in self.conn.execute(
+                "SELECT tag FROM tags WHERE link_id = ? ORDER BY rowid", (link_id,)
+            )]
+        return self._row_to_entry(row, tags)
+
+    def search(self, query, limit=50):
+        with self.lock:
+            return search_link_ids(self.conn, query, limit, fts=self.fts)
+
+    def find_links_by_url(self, url):
+        with self.lock:
+            ids = [row["id"] for row in self.conn.execute("SELECT id FROM links WHERE url = ?", (url,))]
+        return [self.get_link(link_id) for link_id in ids]
+
+    def _row_to_entry(self, row, tags):
+        try:
+            preview = json.loads(row["preview"])
+        except Exception:
+            preview = {}
+        return {
+            "id": row["id"],
+            "url": row["url"],
+            "title": row["title"],
+            "tags": tags,
+            "category": row["category"],
+            "preview": preview
+        }
+
+    # === Mutations ===
+
+    def add_link(self, entry):
+        with self.lock, self.conn:
+            return self._insert(entry)
+
+    def _insert(self, entry):
+        cursor = self.conn.execute(
+            "INSERT INTO links (url, title, category, preview) VALUES (?, ?, ?, ?)",
+            (
+                entry.get("url", ""),
+                entry.get("title", "") or "",
+                (entry.get("category", "") or "").strip(),
+                json.dumps(entry.get("preview") or {}, ensure_ascii=False)
+            )
+        )
+        link_id = cursor.lastrowid
+        tags = normalize_tags(entry.get("tags"))
+        self.conn.executemany(
+            "INSERT INTO tags (link_id, tag) VALUES (?, ?)",
+            [(link_id, tag) for tag in tags]
+        )
+        if self.fts:
+            index_link(self.conn, link_id, dict(entry, tags=tags))
+        return link_id
+
+    def _reindex(self, link_id):
+        if self.fts:
+            entry = self.get_link(link_id)
+            if entry is not None:
+                index_link(self.conn, link_id, entry)
+
+    def update_tags(self, link_id, tags):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM tags WHERE link_id = ?", (link_id,))
+            self.conn.executemany(
+                "INSERT INTO tags (link_id, tag) VALUES (?, ?)",
+                [(link_id, tag) for tag in normalize_tags(tags)]
+            )
+            self._reindex(link_id)
+
+    def update_preview(self, link_id, preview):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE links SET preview = ? WHERE id = ?",
+                (json.dumps(preview or {}, ensure_ascii=False), link_id)
+            )
+            self._reindex(link_id)
+
+    def delete_link(self, link_id):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM links WHERE id = ?", (link_id,))
+            if self.fts:
+                unindex_links(self.conn, [link_id])
+
+    def rename_category(self, old_name, new_name):
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                "UPDATE links SET category = ? WHERE category = ?", (new_name.strip(), old_name)
+            )
+        return cursor.rowcount
+
+    def delete_category(self, category):
+        """Deletes every link in the category and returns their URLs."""
+        with self.lock, self.conn:
+            rows = self.conn.execute(
+                "SELECT id, url FROM links WHERE category = ?", (category,)
+            ).fetchall()
+            self.conn.execute("DELETE FROM links WHERE category = ?", (category,))
+            if self.fts:
+                unindex_links(self.conn, [row["id"] for row in rows])
+        return [row["url"] for row in rows]
+
+class WalCheckpointer(threading.Thread):
+    """Periodically compacts the write-ahead log into the main database file.
+
+    Uses its own connection and PASSIVE checkpoints, so it never blocks the
+    GUI thread's writes. After a crash SQLite replays the WAL on next open.
+    """
+
+    def __init__(self, db_path, interval=CHECKPOINT_INTERVAL):
+        super().__init__(name="stashly-wal-checkpoint", daemon=True)
+        self.db_path = db_path
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            while not self.stopped.wait(self.interval):
+                try:
+                    conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+                except sqlite3.Error as e:
+                    print("WAL checkpoint failed:", e)
+        finally:
+            conn.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join(timeout=5)
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = LinkStore()
+        return _store
+
+def close_store():
+    """Closes the store if this process opened it."""
+    with _store_lock:
+        if _store is not None:
+            _store.close()
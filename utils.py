@@ -1,80 +1,337 @@
-from urllib.parse import urlparse, urljoin
-import requests, os, hashlib, json
-from bs4 import BeautifulSoup
+from urllib.parse import urlparse, urljoin, urlunparse
+from html.parser import HTMLParser
+import hashlib, codecs, time
 
-from paths import get_cache_dir
+from cache import get_cache_store, url_key, favicon_key
+from fetcher import get_fetch_engine, classify_fetch_error, CircuitOpenError
+from settings import get_setting
+
+class HeadMetadataParser(HTMLParser):
+    """Incremental parser that only collects the preview fields from <head>."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.done = False
+        self.title = None
+        self.in_title = False
+        self.title_parts = []
+        self.meta = {}
+        self.icon_href = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == "body":
+            self.done = True
+            return
+
+        attrs = dict(attrs)
+        if tag == "title" and self.title is None:
+            self.in_title = True
+        elif tag == "meta":
+            key = (attrs.get("name") or attrs.get("property") or "").lower()
+            content = attrs.get("content")
+            if key and content and key not in self.meta:
+                self.meta[key] = content
+        elif tag == "link" and self.icon_href is None:
+            rel = (attrs.get("rel") or "").lower().split()
+            if any("icon" in value for value in rel) and attrs.get("href"):
+                self.icon_href = attrs["href"]
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag == "title" and self.in_title:
+            self.in_title = False
+            self.title = "".join(self.title_parts)
+        elif tag == "head":
+            self.done = True
+
+    def handle_data(self, data):
+        if self.in_title:
+            self.title_parts.append(data)
+
+def read_head_metadata(response, max_bytes=None):
+    """Feeds the response body to HeadMetadataParser until </head> or the byte budget."""
+    max_bytes = max_bytes or get_setting("preview_max_head_bytes")
+
+    try:
+        decoder = codecs.getincrementaldecoder(response_encoding(response))(errors="replace")
+    except LookupError:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    parser = HeadMetadataParser()
+    received = 0
+    for chunk in response.iter_content(chunk_size=16 * 1024):
+        received += len(chunk)
+        parser.feed(decoder.decode(chunk))
+        if parser.done or received >= max_bytes:
+            break
+
+    if parser.in_title:
+        parser.title = "".join(parser.title_parts)
+    return parser
+
+def response_encoding(response):
+    # requests falls back to ISO-8859-1 when the header has no charset; HTML is almost always UTF-8
+    content_type = response.headers.get("content-type", "").lower()
+    return response.encoding if "charset" in content_type else "utf-8"
+
+HEAD_END_MARKERS = (b"</head", b"<body")
+
+def read_head_bytes(response, max_bytes=None):
+    """Raw page bytes up to </head> or the byte budget, for parsing somewhere else."""
+    max_bytes = max_bytes or get_setting("preview_max_head_bytes")
+    chunks = []
+    received = 0
+    tail = b""
+    for chunk in response.iter_content(chunk_size=16 * 1024):
+        chunks.append(chunk)
+        received += len(chunk)
+        # Keep a few bytes of the previous chunk so a marker split across chunks is still seen
+        window = (tail + chunk).lower()
+        if any(marker in window for marker in HEAD_END_MARKERS) or received >= max_bytes:
+            break
+        tail = window[-8:]
+    return b"".join(chunks)
+
+def parse_head_bytes(data, encoding="utf-8"):
+    """Parses bytes from read_head_bytes into the fields build_preview needs."""
+    try:
+        text = data.decode(encoding, errors="replace")
+    except LookupError:
+        text = data.decode("utf-8", errors="replace")
+    parser = HeadMetadataParser()
+    parser.feed(text)
+    if parser.in_title:
+        parser.title = "".join(parser.title_parts)
+    return head_fields(parser)
+
+def head_fields(parser):
+    return {"title": parser.title, "meta": parser.meta, "icon_href": parser.icon_href}
+
+def resolve_favicon_url(url, icon_url):
+    if icon_url.startswith("//"):
+        return "https:" + icon_url
+    elif icon_url.startswith("/"):
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc}{icon_url}"
+    elif icon_url.startswith("http"):
+        return icon_url
+    else:
+        return url + "/" + icon_url
+
+PREVIEW_FIELDS = ("title", "description", "favicon", "thumbnail")
 
 def extract_link_preview(url):
-    cache_folder = get_cache_folder_for_url(url)
-    preview_path = os.path.join(cache_folder, "preview.txt")
-
-     # ✅ Check if cached preview exists
-    if os.path.exists(preview_path):
-        try:
-            with open(preview_path, "r", encoding="utf-8") as f:
-                print(f"Loaded from cache: {url}")
-                return json.load(f)
-        except Exception as e:
-            print("Failed to load cached preview:", e)
+    # ✅ Cached previews are returned as-is, even when stale (stale-while-revalidate)
+    cached = load_cached_preview(url)
+    if cached is not None:
+        print(f"Loaded from cache: {url}")
+        return cached
+
+    # ⏳ Links that failed recently are not retried until their backoff expires
+    failure = load_failure_record(url)
+    if failure and time.time() < failure.get("next_retry_at", 0):
+        return placeholder_preview(url, failure.get("error", ""))
 
     # 🛰️ Fetch preview from the web
-    headers = {"User-Agent": "Mozilla/5.0"}
     try:
-        response = requests.get(url, headers=headers, timeout=8)
-        response.raise_for_status()
+        preview = fetch_link_preview(url)
+    except CircuitOpenError as e:
+        # The host is down; this is not an attempt against the link itself
+        return placeholder_preview(url, classify_fetch_error(e))
     except Exception as e:
         print("Preview fetch failed:", e)
-        return {"title": url, "description": "", "favicon": "", "thumbnail": ""}
-
-    soup = BeautifulSoup(response.text, "html.parser")
-    title = soup.title.string.strip() if soup.title and soup.title.string else url
-
-    description = ""
-    desc_tag = soup.find("meta", attrs={"name": "description"}) or soup.find("meta", attrs={"property": "og:description"})
-    if desc_tag and desc_tag.get("content"):
-        description = desc_tag["content"].strip()
-
-    thumbnail = ""
-    thumb_tag = soup.find("meta", attrs={"property": "og:image"})
-    if thumb_tag and thumb_tag.get("content"):
-        thumbnail = thumb_tag["content"].strip()
-
-    favicon = ""
-    icon_tag = soup.find("link", rel=lambda x: x and "icon" in x.lower())
-    if icon_tag and icon_tag.get("href"):
-        icon_url = icon_tag["href"]
-        if icon_url.startswith("//"):
-            favicon = "https:" + icon_url
-        elif icon_url.startswith("/"):
-            from urllib.parse import urlparse
-            parsed = urlparse(url)
-            favicon = f"{parsed.scheme}://{parsed.netloc}{icon_url}"
-        elif icon_url.startswith("http"):
-            favicon = icon_url
-        else:
-            favicon = url + "/" + icon_url
-
-    preview = {
+        failure = record_preview_failure(url, e, failure)
+        return placeholder_preview(url, failure["error"])
+
+    # 💾 Save preview to cache
+    clear_failure_record(url)
+    save_cached_preview(url, preview)
+    return preview
+
+def placeholder_preview(url, error):
+    return {"title": url, "description": "", "favicon": "", "thumbnail": "", "error": error}
+
+def validator_headers(validators):
+    headers = {}
+    if validators:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+def fetch_link_preview(url, validators=None):
+    """Fetches a fresh preview; returns None on 304 when validators are given."""
+    # Only the <head> is streamed and parsed; the rest of the page is never downloaded
+    with get_fetch_engine().open(url, timeout=8, headers=validator_headers(validators)) as response:
+        if response.status_code == 304 and validators:
+            return None
+        response.raise_for_status()
+        head = head_fields(read_head_metadata(response))
+        etag = response.headers.get("ETag", "")
+        last_modified = response.headers.get("Last-Modified", "")
+
+    return build_preview(url, head, etag, last_modified)
+
+def build_preview(url, head, etag="", last_modified=""):
+    title = (head["title"] or "").strip() or url
+    meta = head["meta"]
+    description = (meta.get("description") or meta.get("og:description") or "").strip()
+    thumbnail = (meta.get("og:image") or "").strip()
+    favicon = resolve_favicon_url(url, head["icon_href"]) if head["icon_href"] else ""
+
+    return {
         "title": title,
         "description": description,
         "favicon": favicon,
-        "thumbnail": thumbnail
+        "thumbnail": thumbnail,
+        "etag": etag,
+        "last_modified": last_modified,
+        "fetched_at": time.time()
     }
 
-    # 💾 Save preview to cache
+def is_preview_stale(preview):
+    return time.time() - preview.get("fetched_at", 0) > get_setting("preview_ttl_seconds")
+
+def pending_preview(url, title=""):
+    """Stored with a new link until its preview has been fetched in the background."""
+    return {"title": title or url, "description": "", "favicon": "", "thumbnail": "", "pending": True}
+
+def embedded_preview(entry):
+    """The preview stored with a link entry, or None if it has to be fetched."""
+    preview = entry.get("preview")
+    if not preview or not preview.get("title") or preview.get("error") or preview.get("pending"):
+        return None
+    return preview
+
+def preview_for_entry(entry, preview):
+    """The preview as stored with entry; a title the user typed wins over the page's."""
+    if entry.get("title"):
+        return dict(preview, title=entry["title"])
+    return preview
+
+def revalidate_link_preview(url, cached):
+    """Conditional GET for a stale preview.
+
+    Returns the current preview: the new one when the page changed, or the
+    cached copy with a fresh fetched_at when it is still current (a 304
+    costs no body at all). Returns None if the page could not be reached.
+    """
+    try:
+        fresh = fetch_link_preview(url, validators=cached)
+    except Exception as e:
+        print("Preview revalidation failed:", e)
+        return None
+
+    if fresh is None:
+        current = dict(cached, fetched_at=time.time())
+        save_cached_preview(url, current)
+        return current
+
+    drop_changed_images(url, cached, fresh)
+    save_cached_preview(url, fresh)
+    return fresh
+
+def drop_changed_images(url, old, new):
+    # Downloaded images whose source URL changed have to be fetched again
+    if new["thumbnail"] != old.get("thumbnail"):
+        get_cache_store().delete(url_key(url), "thumbnail-source", *THUMBNAIL_ENTRIES)
+    if new["favicon"] != old.get("favicon"):
+        forget_favicon(url)
+
+# === Cache entries ===
+# Everything cached about a URL lives in the cache pack under url_key(url).
+
+THUMBNAIL_ENTRIES = ("thumb@1", "thumb@2")
+
+def thumbnail_entry(scale):
+    return f"thumb@{scale}"
+
+def load_cached_preview(url):
+    return get_cache_store().get_json(url_key(url), "preview")
+
+def save_cached_preview(url, preview):
     try:
-        with open(preview_path, "w", encoding="utf-8") as f:
-            json.dump(preview, f, ensure_ascii=False, indent=2)
+        get_cache_store().put_json(url_key(url), "preview", preview)
     except Exception as e:
         print("Failed to save preview cache:", e)
 
-    return preview
+def delete_cached_link(url):
+    get_cache_store().delete(url_key(url))
+
+def load_failure_record(url):
+    return get_cache_store().get_json(url_key(url), "failure")
+
+def record_preview_failure(url, error, previous=None):
+    attempts = (previous or {}).get("attempts", 0) + 1
+    delay = min(
+        get_setting("failure_backoff_base_seconds") * 2 ** (attempts - 1),
+        get_setting("failure_backoff_max_seconds")
+    )
+    now = time.time()
+    failure = {
+        "error": classify_fetch_error(error),
+        "message": str(error),
+        "attempts": attempts,
+        "failed_at": now,
+        "next_retry_at": now + delay
+    }
+    try:
+        get_cache_store().put_json(url_key(url), "failure", failure)
+    except Exception as e:
+        print("Failed to save failure record:", e)
+    return failure
 
+def clear_failure_record(url):
+    get_cache_store().delete(url_key(url), "failure")
 
+# === Shared favicon store ===
+# Favicons are stored once per origin, content-addressed under favicon_key(sha256)
+# ("source" plus "@1"/"@2" derivatives); favicon_origins maps each origin to its hash.
 
-def get_cache_folder_for_url(url):
-    hashed = hashlib.md5(url.encode()).hexdigest()
-    base_cache = get_cache_dir()  # like ~/.stashly/cache
-    path = os.path.join(base_cache, hashed)
-    os.makedirs(path, exist_ok=True)
-    return path
+def favicon_origin(url):
+    try:
+        parsed = urlparse(url)
+    except ValueError:
+        return url.strip().lower()
+    return f"{parsed.scheme.lower()}://{parsed.netloc.lower()}"
+
+def lookup_favicon(url):
+    """Returns the content hash of the origin's favicon, or None."""
+    return get_cache_store().get_favicon_hash(favicon_origin(url))
+
+def store_favicon(url, data):
+    cache = get_cache_store()
+    content_hash = hashlib.sha256(data).hexdigest()
+    if cache.get(favicon_key(content_hash), "source") is None:
+        cache.put(favicon_key(content_hash), "source", data)
+    if cache.get_favicon_hash(favicon_origin(url)) != content_hash:
+        cache.set_favicon_hash(favicon_origin(url), content_hash)
+    return content_hash
+
+def favicon_entry(scale):
+    return f"@{scale}"
+
+def forget_favicon(url):
+    get_cache_store().forget_favicon_origin(favicon_origin(url))
+
+def normalize_url(url):
+    """Key for de-duplicating fetches: case-insensitive scheme/host, no fragment, no default port.
+
+    Malformed URLs (bad port, unclosed IPv6 bracket) are returned stripped
+    but otherwise unchanged; their fetch fails later into a placeholder.
+    """
+    url = url.strip()
+    try:
+        parsed = urlparse(url)
+        scheme = parsed.scheme.lower()
+        netloc = parsed.netloc.lower()
+        if (scheme, parsed.port) in (("http", 80), ("https", 443)):
+            netloc = netloc.rsplit(":", 1)[0]
+    except ValueError:
+        return url
+    return urlunparse((scheme, netloc, parsed.path or "/", parsed.params, parsed.query, ""))
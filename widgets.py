@@ -1,18 +1,23 @@
 from PyQt6.QtWidgets import *
-from PyQt6.QtGui import QCursor, QPainter, QColor, QPen, QPixmap, QFont
-from PyQt6.QtCore import Qt, pyqtSignal, QEvent
+from PyQt6.QtGui import QAction
+from PyQt6.QtCore import Qt, pyqtSignal, QEvent, QPoint, QTimer
 import os, json
 
 from utils import *
 from paths import *
 from flowlayout import *
 from linkcard import *
+from repository import get_repository
+from cards import *
+from events import get_repository_signals
 
 class CategoryLinksWindow(QWidget):
     def __init__(self, category_name):
         super().__init__()
         self.setWindowTitle(f"Links in Category: {category_name}")
+        self.category_name = category_name
         self.resize(1800, 900)
+        self.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
 
         layout = QVBoxLayout()
 
@@ -21,162 +26,144 @@ class CategoryLinksWindow(QWidget):
         title.setStyleSheet("font-size: 16px; font-weight: bold; margin-bottom: 10px;")
         layout.addWidget(title)
 
-        self.list_widget = QListWidget()
-        layout.addWidget(self.list_widget)
+        # Model/view: rows are painted by the delegate, only visible ones cost anything
+        self.list_view = QListView()
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.list_view.setMouseTracking(True)
+        self.list_view.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.list_view.customContextMenuRequested.connect(self.show_context_menu)
+        self.delegate = LinkCardDelegate(self.list_view)
+        self.list_view.setItemDelegate(self.delegate)
+        layout.addWidget(self.list_view)
+
+        # Re-rank queued fetches as the visible rows change
+        self.priority_timer = QTimer(self)
+        self.priority_timer.setSingleShot(True)
+        self.priority_timer.setInterval(50)
+        self.priority_timer.timeout.connect(self.update_fetch_priorities)
+        self.list_view.verticalScrollBar().valueChanged.connect(self.priority_timer.start)
 
         self.setLayout(layout)
         self.load_links(category_name)
-
-    def load_links(self, category_name):
-        file_path = get_data_file_path()
-        if not os.path.exists(file_path):
+        self.priority_timer.start()
+
+        # Links saved or refreshed elsewhere show up here as they change
+        signals = get_repository_signals()
+        signals.link_added.connect(self.on_link_added)
+        signals.link_updated.connect(self.on_link_updated)
+        signals.link_deleted.connect(self.on_link_deleted)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.priority_timer.start()
+
+    def closeEvent(self, event):
+        # Nothing queued for this window is worth fetching once it is gone
+        self.priority_timer.stop()
+        self.model.cancel_all()
+        super().closeEvent(event)
+
+    def update_fetch_priorities(self):
+        count = self.model.rowCount()
+        if count == 0:
             return
 
-        with open(file_path, 'r') as f:
-            data = json.load(f)
+        viewport = self.list_view.viewport()
+        first = self.list_view.indexAt(QPoint(0, 0)).row()
+        last = self.list_view.indexAt(QPoint(0, viewport.height() - 1)).row()
+        first = max(first, 0)
+        last = count - 1 if last < 0 else last
 
-        for link in data:
-            if link.get("category", "").strip() == category_name:
-                url = link.get("url", "")
-                tags =  link.get("tags", [])
+        # One screen above and below the viewport counts as "near"
+        page = last - first + 1
+        priorities = {}
+        for row in range(max(0, first - page), min(count, last + page + 1)):
+            priorities[row] = PRIORITY_VISIBLE if first <= row <= last else PRIORITY_NEAR
+        self.model.update_priorities(priorities)
 
-                link_card = LinkCard(url, tags)
+    def load_links(self, category_name):
+        # Rows are resolved over several event-loop ticks; the window shows immediately
+        self.model = LinkListModel(get_repository().link_ids_in_category(category_name), self)
+        self.list_view.setModel(self.model)
+
+    def on_link_added(self, entry):
+        if entry.get("category") == self.category_name:
+            self.model.append_entry(entry)
+            self.priority_timer.start()
+
+    def on_link_updated(self, entry):
+        self.model.apply_entry(entry)
+
+    def on_link_deleted(self, entry):
+        row = self.model.row_of(entry["id"])
+        if row >= 0:
+            self.model.remove_row(row)
+            self.priority_timer.start()
+        else:
+            self.model.forget_id(entry["id"])
 
-                item = QListWidgetItem()
-                item.setSizeHint(link_card.sizeHint())
-                self.list_widget.addItem(item)
-                self.list_widget.setItemWidget(item, link_card)
+    def show_context_menu(self, position):
+        index = self.list_view.indexAt(position)
+        if not index.isValid():
+            return
 
-                link_card.delete_requested.connect(lambda url, item=item: self.remove_link_card(url, item))
-    
-    def remove_link_card(self, url, item):
-        # Remove the item from the QListWidget
-        row = self.list_widget.row(item)
-        self.list_widget.takeItem(row)
+        menu = QMenu(self)
 
-        # Remove the link from the JSON data
-        file_path = get_data_file_path()
-        if os.path.exists(file_path):
-            with open(file_path, "r") as f:
-                data = json.load(f)
+        modify_action = QAction("Modify Tags", self)
+        modify_action.triggered.connect(lambda: self.modify_tags(index.row()))
 
-            data = [entry for entry in data if entry.get("url") != url]
+        delete_action = QAction("Delete Link", self)
+        delete_action.triggered.connect(lambda: self.delete_link(index.row()))
 
-            with open(file_path, "w") as f:
-                json.dump(data, f, indent=2)
+        menu.addAction(modify_action)
+        menu.addSeparator()
+        menu.addAction(delete_action)
 
-class CategoryCard(QFrame):
-    clicked = pyqtSignal(str)
-    rightclicked = pyqtSignal(str)
+        menu.exec(self.list_view.viewport().mapToGlobal(position))
 
-    def __init__(self, category_name, icon_path=None, fallback_icon_path="minimize.png"):
-        super().__init__()
+    def modify_tags(self, row):
+        entry = self.model.links[row]
+        current_tags = ", ".join(entry.get("tags", []))
+        new_tags, ok = QInputDialog.getText(self, "Modify Tags", "Enter new tags :", text=current_tags)
+        if not ok:
+            return
 
-        self.category_name = category_name
-        self.setObjectName("CategoryCard")
-        self.setCursor(Qt.CursorShape.PointingHandCursor)
-        self.setStyleSheet("""
-            QFrame#CategoryCard {
-                background-color: rgba(255, 255, 255, 30);
-                border-radius: 12px;
-                border: 1px solid rgba(255, 255, 255, 40);
-            }
-            QFrame#CategoryCard:hover {
-                background-color: rgba(255, 255, 255, 50);
-            }
-            QLabel {
-                background: transparent;
-                color: white;
-                font-size: 14px;
-            }
-        """)
-
-        # Mouse tracking for hover and click
-        self.setMouseTracking(True)
-
-        self.setFixedSize(150, 150)  # Uniform size for all cards
-
-        # Main layout
-        layout = QVBoxLayout()
-        layout.setContentsMargins(10, 10, 10, 10)
-        layout.setSpacing(8)
-        layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
-
-        # Icon container
-        icon_container = QWidget()
-        icon_container_layout = QVBoxLayout(icon_container)
-        icon_container_layout.setContentsMargins(0, 0, 0, 0)
-        icon_container_layout.setSpacing(0)
-        icon_container_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
-
-        icon_label = QLabel()
-        icon_label.setFixedSize(48, 48)
-        icon_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-
-        icon_mapping = load_icon_mapping()
-        mapped_icon_path = icon_mapping.get(category_name)
-
-        # Check icon_path validity; else fallback
-        pixmap = None
-        if mapped_icon_path and os.path.exists(mapped_icon_path):
-            pixmap = QPixmap(mapped_icon_path)
-        elif icon_path and os.path.exists(icon_path):
-            pixmap = QPixmap(icon_path)
-        elif fallback_icon_path and os.path.exists(fallback_icon_path):
-            pixmap = QPixmap(fallback_icon_path)
-        else:
-            # Create a simple colored pixmap fallback (e.g., gray square)
-            pixmap = QPixmap(64, 64)
-            pixmap.fill(QColor(180, 180, 180))
+        tags = [tag.strip() for tag in new_tags.split(",") if tag.strip()]
 
-        icon_label.setPixmap(
-            pixmap.scaled(48, 48, Qt.AspectRatioMode.KeepAspectRatioByExpanding, Qt.TransformationMode.SmoothTransformation)
-        )
-        icon_container_layout.addWidget(icon_label)
-        icon_container.setLayout(icon_container_layout)
+        # Persist changes through the repository (single row update); its
+        # "updated" event refreshes the row through on_link_updated
+        try:
+            get_repository().update_tags(entry["id"], tags)
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Failed to update tags:\n{str(e)}")
+            return
 
-        # Category name
-        name_label = QLabel(category_name)
-        name_label.setFont(QFont("Arial", 11, QFont.Weight.Medium))
-        name_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        name_label.setWordWrap(True)
-        name_label.setStyleSheet("color: white;")
+    def delete_link(self, row):
+        entry = self.model.links[row]
+        url = entry["url"]
+        confirm = QMessageBox.question(self, "Delete Link",
+        f"Are you sure you want to delete this link?\n{url}",
+        QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if confirm != QMessageBox.StandardButton.Yes:
+            return
 
-        layout.addWidget(icon_container)
-        layout.addWidget(name_label)
+        try:
+            delete_cached_link(url)
+        except Exception as e:
+            QMessageBox.warning(self, "Cache Deletion Failed", f"Failed to delete cached data:\n{str(e)}")
 
-        self.setLayout(layout)
-        # Unified translucent card styling
-        self.setStyleSheet("""
-            QFrame#CategoryCard {
-                background-color: rgba(255, 255, 255, 0.08);
-                border: 1px solid rgba(255, 255, 255, 0.2);
-                border-radius: 12px;
-            }
-            QFrame#CategoryCard:hover {
-                background-color: rgba(0, 122, 204, 0.3);
-                border: 1px solid #007acc;
-            }
-        """)
-    
-    def mouseReleaseEvent(self, event):
-        if event.button() == Qt.MouseButton.LeftButton:
-            self.clicked.emit(self.category_name)
-        if event.button() == Qt.MouseButton.RightButton:
-            self.rightclicked.emit(self.category_name)
-    
-    def get_pixmap(self, icon_path):
-        """Returns QPixmap from icon_path, or fallback if not found."""
-        fallback_path = "minimize.png"
-        if icon_path and os.path.exists(icon_path):
-            return QPixmap(icon_path)
-        elif os.path.exists(fallback_path):
-            return QPixmap(fallback_path)
-        else:
-            # Final fallback: empty transparent pixmap
-            pixmap = QPixmap(40, 40)
-            pixmap.fill(Qt.GlobalColor.transparent)
-            return pixmap
+        self.remove_link_card(entry["id"])
+
+    def remove_link_card(self, link_id):
+        # Rows can shift while the dialog is open; find this link's row again
+        row = self.model.row_of(link_id)
+        if row >= 0:
+            self.model.remove_row(row)
+            self.priority_timer.start()
+
+        # Remove the single link row from the repository
+        get_repository().delete_link(link_id)
 
 class AddLinkWindow(QWidget):
 
@@ -239,28 +226,18 @@ class AddLinkWindow(QWidget):
             self.tags_input.setCurrentText("")
 
     def load_existing_tags_categories(self):
-        file_path = get_data_file_path()
-
-        tags_set = set()
-        categories_set = set()
-
-        if os.path.exists(file_path):
-            try:
-                with open(file_path, 'r') as f:
-                    data = json.load(f)
-                    for item in data:
-                        if item.get("tags"):
-                            if isinstance(item["tags"], list):
-                                tags_set.update(map(str.strip, item["tags"]))
-                            elif isinstance(item["tags"], str):
-                                tags_set.update(map(str.strip, item["tags"].split(",")))
-                        if item.get("category"):
-                            categories_set.add(item["category"].strip())
-            except Exception as e:
-                print("Error reading data file:", e)
-
-        self.tags_input.addItems(sorted(tags_set))
-        self.category_input.addItems(sorted(categories_set))
+        tags = []
+        categories = []
+
+        try:
+            repository = get_repository()
+            tags = repository.tags()
+            categories = repository.categories()
+        except Exception as e:
+            print("Error reading link repository:", e)
+
+        self.tags_input.addItems(tags)
+        self.category_input.addItems(categories)
 
     def remove_tag(self, tag_text, widget):
         if tag_text in self.tags_list:
@@ -277,71 +254,32 @@ class AddLinkWindow(QWidget):
         if url.strip() == "":
             print("URL is required!")
             return
-        
-        preview = extract_link_preview(url)
 
         entry = {
             "url": url,
             "title": title,
             "tags": tags,
             "category": category,
-            "preview" : {
-                "title" : title or preview["title"],
-                "description" : preview["description"],
-                "thumbnail" : preview["thumbnail"]
-            }
+            "preview" : pending_preview(url, title)
         }
 
-        file_path = get_data_file_path()
+        link_id = get_repository().add_link(entry)
 
-        # Load existing data and append
-        try:
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-        except Exception:
-            data = []
-        
-        data.append(entry)
-
-        with open(file_path, 'w') as f:
-            json.dump(data, f, indent=2)
+        # The preview is fetched on the worker pool; the dialog does not wait for it
+        get_fetch_coordinator().request_preview(
+            url, lambda preview, link_id=link_id: store_fetched_preview(link_id, preview)
+        )
 
         print("Link saved successfully")
         self.link_saved.emit(category)
         self.close()
 
-class PlusButton(QPushButton):
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.default_color = "#4682B4"
-        self.hover_color = "#6495ED"
-        self.current_color = self.default_color
-
-        self.setFixedSize(60, 60)
-        self.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
-        self.setStyleSheet("background-color: #4682B4; border-radius: 30px;")
-        self.setToolTip("Add new link")
-
-    def enterEvent(self, event):
-        self.current_color = self.hover_color
-        self.setStyleSheet(f"background-color: {self.current_color}; border-radius: 30px;")
-        super().enterEvent(event)
-
-    def leaveEvent(self, event):
-        self.current_color = self.default_color
-        self.setStyleSheet(f"background-color: {self.current_color}; border-radius: 30px;")
-        super().leaveEvent(event)
-
-    def paintEvent(self, event):
-        super().paintEvent(event)
-        # Draw plus sign in the center
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        pen = QPen(QColor('white'))
-        pen.setWidth(3)
-        painter.setPen(pen)
-        w, h = self.width(), self.height()
-        # Draw vertical line
-        painter.drawLine(w//2, 3*h//10, w//2, 7*h//10)
-        # Draw horizontal line
-        painter.drawLine(3*w//10, h//2, 7*w//10, h//2)
\ No newline at end of file
+def store_fetched_preview(link_id, preview):
+    repository = get_repository()
+    entry = repository.get_link(link_id)
+    if entry is None:
+        return
+    try:
+        repository.update_preview(link_id, preview_for_entry(entry, preview))
+    except Exception as e:
+        print("Failed to store preview:", e)